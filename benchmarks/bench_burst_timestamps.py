@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+Benchmark: burst mode timestamp accuracy against a loopback responder
+
+A UDP echo responder runs on 127.0.0.1 (one port per target). The reference
+RTT comes from a tight blocking send/recv loop with no event loop involved;
+the engine is then run with single probes and with bursts against 1..N
+targets at once, all bursts interleaved. The difference between the RTTs the
+engine reports and the reference is the scheduling overhead in the
+timestamps. The cycle time shows that a burst of N costs (N - 1) x spacing,
+not N cycles.
+
+ICMP to 127.0.0.x is measured the same way when this machine allows ICMP
+sockets (the kernel answers, so there is no blocking reference - the single
+probe on an idle loop is the baseline).
+
+Usage:
+python benchmarks/bench_burst_timestamps.py [--targets 1 10 50] [--burst 10] [--cycles 20]
+"""
+
+import argparse
+import asyncio
+import os
+import selectors
+import socket
+import statistics
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ping_engine import ProbeScheduler
+from ping_probers import IcmpProber, MultiProber
+
+
+class UdpResponder:
+    """Echoes every datagram back at once, on count loopback ports"""
+
+    def __init__(self, count):
+        self.selector = selectors.DefaultSelector()
+        self.sockets = []
+        for _ in range(count):
+            sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            sock.bind(("127.0.0.1", 0))
+            sock.setblocking(False)
+            self.selector.register(sock, selectors.EVENT_READ)
+            self.sockets.append(sock)
+        self.ports = [sock.getsockname()[1] for sock in self.sockets]
+        self.running = True
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def _run(self):
+        while self.running:
+            for key, _ in self.selector.select(0.1):
+                try:
+                    data, source = key.fileobj.recvfrom(2048)
+                    key.fileobj.sendto(data, source)
+                except OSError:
+                    pass
+
+    def close(self):
+        self.running = False
+        self.thread.join()
+        for sock in self.sockets:
+            sock.close()
+
+
+def blocking_reference(port, samples):
+    """RTTs (ms) from a tight blocking loop - the best timestamps this machine can take"""
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sock.connect(("127.0.0.1", port))
+    sock.settimeout(1.0)
+    rtts = []
+    for _ in range(samples):
+        sent = time.perf_counter()
+        sock.send(b"reference")
+        sock.recv(2048)
+        rtts.append((time.perf_counter() - sent) * 1000.0)
+    sock.close()
+    return rtts
+
+
+def run_engine(loop, prober, targets, burst, spacing, cycles, timeout):
+    """Run cycles and return (every RTT reported in ms, lost probes, mean cycle seconds)"""
+    rtts = []
+    lost = [0]
+
+    def collect(result):
+        samples = result.burst["rtts"] if result.burst else [result.value]
+        for rtt in samples:
+            if isinstance(rtt, float):
+                rtts.append(rtt)
+            else:
+                lost[0] += 1
+
+    scheduler = ProbeScheduler(targets, prober=prober, timeout=timeout, concurrency=len(targets),
+                               on_result=collect, burst_count=burst, burst_spacing=spacing)
+    loop.run_until_complete(scheduler.run_cycle())  # Warm up (open sockets)
+    rtts.clear()
+    lost[0] = 0
+    started = time.perf_counter()
+    for _ in range(cycles):
+        loop.run_until_complete(scheduler.run_cycle())
+    return rtts, lost[0], (time.perf_counter() - started) / cycles
+
+
+def percentile(values, q):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q / 100.0 * len(ordered)))]
+
+
+def report(label, rtts, lost, cycle, reference):
+    median = statistics.median(rtts)
+    print(f"{label:<28} {len(rtts):>6} {lost:>5} {cycle * 1000:>9.1f} {median * 1000:>9.0f} "
+          f"{percentile(rtts, 95) * 1000:>9.0f} {max(rtts) * 1000:>9.0f} "
+          f"{(median - reference) * 1000:>+10.0f}")
+
+
+def header(reference_label, reference):
+    print(f"\n{reference_label}: median {reference * 1000:.0f}us")
+    print(f"{'run':<28} {'probes':>6} {'lost':>5} {'cycle ms':>9} {'med us':>9} {'p95 us':>9} "
+          f"{'max us':>9} {'overhead':>10}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--targets", type=int, nargs="+", default=[1, 10, 50])
+    parser.add_argument("--burst", type=int, default=10)
+    parser.add_argument("--spacing", type=float, default=2.0, help="ms between the probes of a burst")
+    parser.add_argument("--cycles", type=int, default=20)
+    parser.add_argument("--timeout", type=float, default=0.5)
+    args = parser.parse_args()
+    spacing = args.spacing / 1000.0
+
+    responder = UdpResponder(max(args.targets))
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    try:
+        reference = statistics.median(blocking_reference(responder.ports[0], 2000))
+        header("UDP loopback, blocking reference", reference)
+        prober = MultiProber()
+        for count in args.targets:
+            targets = [f"udp://127.0.0.1:{port}" for port in responder.ports[:count]]
+            for burst in (1, args.burst):
+                rtts, lost, cycle = run_engine(loop, prober, targets, burst, spacing,
+                                               args.cycles, args.timeout)
+                report(f"udp targets={count} burst={burst}", rtts, lost, cycle, reference)
+
+        for kind in ("dgram", "raw"):
+            prober = IcmpProber(kind)
+            try:
+                prober.loop = loop
+                prober.open()
+            except OSError:
+                continue
+            baseline, _, _ = run_engine(loop, prober, ["127.0.0.1"], 1, spacing, 200, args.timeout)
+            reference = statistics.median(baseline)
+            header(f"ICMP ({kind}) loopback, single probe on an idle loop", reference)
+            for count in args.targets:
+                targets = [f"127.0.0.{i + 1}" for i in range(count)]
+                for burst in (1, args.burst):
+                    rtts, lost, cycle = run_engine(loop, prober, targets, burst, spacing,
+                                                   args.cycles, args.timeout)
+                    report(f"icmp targets={count} burst={burst}", rtts, lost, cycle, reference)
+            prober.close()
+            break
+        else:
+            print("\nICMP sockets not available here - skipped")
+    finally:
+        loop.close()
+        responder.close()
+
+
+if __name__ == "__main__":
+    main()
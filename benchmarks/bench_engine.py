@@ -0,0 +1,408 @@
+#!/usr/bin/env python3
+"""
+Benchmark suite: the monitoring engine against a simulated network
+
+Runs MonitorCore (scheduler, history, recommender, metrics - everything but
+the window) against 10 to 10,000 targets on a network simulated on this
+machine, and reports per scenario:
+
+    cycle time (first / mean / p50 / max), probes/s, CPU seconds and CPU per
+    probe, peak RSS, time to the first result and to a result for every
+    target, missed ticks and loss
+
+Two kinds of simulated network, each with the latency, jitter, loss and
+blackholing of a NETWORKS profile:
+
+    sim   a fake prober that sleeps for the simulated RTT (engine cost only)
+    udp   udp:// targets on 127.0.0.1, one port each, answered by a responder
+          process that delays, drops or ignores packets (real sockets)
+
+--sources 127.0.0.1 127.0.0.2 ... probes every udp target once per source
+address (multi-path probing - see ping_probers.py); the responder counts
+the probes it got from each address, so every source is checked to have
+really been used.
+
+Runs are reproducible: the network is generated from --seed, scheduling is
+fixed-rate with no jitter or probe budget, and every scenario runs in a fresh
+process so CPU and RSS are its own. --output writes the results as JSON;
+--compare OLD.json prints the change of every metric against an earlier run.
+
+Usage:
+python benchmarks/bench_engine.py [--targets 10 100 1000 10000] [--networks internet lossy]
+                                  [--modes sim udp] [--cycles 3] [--output results.json]
+                                  [--sources 127.0.0.1 127.0.0.2]
+python benchmarks/bench_engine.py --compare before.json --output after.json
+"""
+
+import argparse
+import asyncio
+import heapq
+import json
+import multiprocessing
+import os
+import platform
+import queue
+import random
+import resource
+import selectors
+import socket
+import statistics
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ping_engine import MonitorCore
+from ping_probers import Prober, split_source
+from ping_targets import sourced_spec
+
+# Per-target RTT is latency x uniform(0.5, 1.5); each probe adds gauss(0, jitter),
+# is lost with probability loss, and a blackholed share of targets never answers
+NETWORKS = {
+    "lan": {"latency": 0.001, "jitter": 0.0002, "loss": 0.0, "blackholed": 0.0},
+    "internet": {"latency": 0.030, "jitter": 0.005, "loss": 0.01, "blackholed": 0.02},
+    "lossy": {"latency": 0.080, "jitter": 0.020, "loss": 0.05, "blackholed": 0.10},
+}
+
+# Metrics --compare reports, and whether higher is better
+COMPARED = [("cycle_mean_s", False), ("probes_per_s", True), ("cpu_us_per_probe", False),
+            ("peak_rss_mb", False), ("first_result_s", False), ("all_results_s", False)]
+
+
+def make_network(count, profile, seed):
+    """[(base latency in seconds or None if blackholed)] for count targets"""
+    rng = random.Random(seed)
+    network = []
+    for _ in range(count):
+        if rng.random() < profile["blackholed"]:
+            network.append(None)
+        else:
+            network.append(profile["latency"] * rng.uniform(0.5, 1.5))
+    return network
+
+
+def sample_delay(rng, latency, profile):
+    """Delay of one reply in seconds, or None if this probe is lost"""
+    if latency is None or rng.random() < profile["loss"]:
+        return None
+    return max(0.0, rng.gauss(latency, profile["jitter"]))
+
+
+class SimulatedProber(Prober):
+    """Sleeps for the simulated RTT; lost probes and blackholed targets wait out the timeout"""
+
+    name = "simulated"
+
+    def __init__(self, network, profile, seed):
+        self.latency = {f"sim-{i}": latency for i, latency in enumerate(network)}
+        self.profile = profile
+        self.rng = random.Random(seed + 1)
+
+    async def probe(self, target, timeout):
+        delay = sample_delay(self.rng, self.latency[target], self.profile)
+        if delay is None or delay > timeout:
+            await asyncio.sleep(timeout)
+            return "timeout"
+        await asyncio.sleep(delay)
+        return delay * 1000.0
+
+
+def run_responder(network, profile, seed, ports_out, stop):
+    """Responder process: one UDP port per target, replies delayed, dropped or never sent
+
+    Probes are counted by the address they came from; the counts are put on
+    ports_out after the ports once stop is set.
+    """
+    selector = selectors.DefaultSelector()
+    latency = {}
+    sockets = []
+    for base in network:
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        sock.bind(("127.0.0.1", 0))
+        sock.setblocking(False)
+        selector.register(sock, selectors.EVENT_READ)
+        latency[sock] = base
+        sockets.append(sock)
+    ports_out.put([sock.getsockname()[1] for sock in sockets])
+
+    rng = random.Random(seed + 1)
+    received = {}  # source address -> probes
+    pending = []  # (reply at, sequence, socket, data, source)
+    sequence = 0
+    while not stop.is_set():
+        now = time.monotonic()
+        while pending and pending[0][0] <= now:
+            _, _, sock, data, source = heapq.heappop(pending)
+            try:
+                sock.sendto(data, source)
+            except OSError:
+                pass
+        wait = min(pending[0][0] - now, 0.1) if pending else 0.1
+        for key, _ in selector.select(max(wait, 0.0)):
+            try:
+                data, source = key.fileobj.recvfrom(2048)
+            except OSError:
+                continue
+            received[source[0]] = received.get(source[0], 0) + 1
+            delay = sample_delay(rng, latency[key.fileobj], profile)
+            if delay is not None:
+                sequence += 1
+                heapq.heappush(pending, (time.monotonic() + delay, sequence, key.fileobj, data, source))
+    for sock in sockets:
+        sock.close()
+    ports_out.put(received)
+
+
+def rss_mb():
+    """Resident set size now (Linux), in MB"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 1e6
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def scenario_name(spec):
+    """e.g. udp-lan-1000, or udp-lan-1000x2src when probed from two sources"""
+    name = f"{spec['mode']}-{spec['network']}-{spec['targets']}"
+    sources = spec.get("sources") or []
+    if spec["mode"] == "udp" and len(sources) > 1:
+        name += f"x{len(sources)}src"
+    return name
+
+
+def run_scenario(spec):
+    """Run one scenario in this process and return its results"""
+    profile = NETWORKS[spec["network"]]
+    network = make_network(spec["targets"], profile, spec["seed"])
+    responder = stop = None
+    if spec["mode"] == "udp":
+        ports = multiprocessing.Queue()
+        stop = multiprocessing.Event()
+        responder = multiprocessing.Process(target=run_responder,
+                                            args=(network, profile, spec["seed"], ports, stop))
+        responder.start()
+        sources = spec.get("sources") or [None]
+        targets = [sourced_spec(f"udp://127.0.0.1:{port}", source)
+                   for port in ports.get(timeout=60) for source in sources]
+        prober = None  # The engine's own MultiProber
+    else:
+        targets = [f"sim-{i}" for i in range(len(network))]
+        prober = SimulatedProber(network, profile, spec["seed"])
+
+    monitor = MonitorCore(targets, prober=prober, interval=spec["interval"], timeout=spec["timeout"],
+                          concurrency=spec["concurrency"], jitter=0.0, probe_rate=None, adaptive=False)
+    scheduler = monitor.scheduler
+    rss_before = rss_mb()
+    cycle_times = []
+    seen = set()
+    results = lost = 0
+    first_result = all_results = None
+    cycles_seen = 0
+    per_source = {}  # source -> answered probes
+
+    cpu_started = time.process_time()
+    started = time.perf_counter()
+    monitor.start()
+    deadline = started + spec["max_seconds"]
+    while cycles_seen < spec["cycles"] and time.perf_counter() < deadline:
+        try:
+            batch = [monitor.results.get(timeout=0.01)]
+        except queue.Empty:
+            batch = []
+        now = time.perf_counter()
+        batch.extend(monitor.drain())
+        for result in batch:
+            results += 1
+            if not isinstance(result.value, float):
+                lost += 1
+            else:
+                source = split_source(result.target)[1]
+                per_source[source] = per_source.get(source, 0) + 1
+            if first_result is None:
+                first_result = now - started
+            if all_results is None:
+                seen.add(result.target)
+                if len(seen) == len(targets):
+                    all_results = now - started
+        if scheduler.cycles != cycles_seen:
+            cycles_seen = scheduler.cycles
+            cycle_times.append(scheduler.last_cycle_time)
+    elapsed = time.perf_counter() - started
+    probes = scheduler.probes
+    cpu = time.process_time() - cpu_started
+    rss_after = rss_mb()
+    monitor.stop(timeout=spec["timeout"] + 5)
+
+    received = None
+    if responder is not None:
+        stop.set()
+        received = ports.get(timeout=10)
+        responder.join(10)
+
+    def rounded(value, digits=4):
+        return round(value, digits) if value is not None else None
+
+    return {
+        "scenario": scenario_name(spec),
+        "mode": spec["mode"],
+        "network": spec["network"],
+        "targets": spec["targets"],
+        "cycles": len(cycle_times),
+        "cycle_first_s": rounded(cycle_times[0]) if cycle_times else None,
+        "cycle_mean_s": rounded(statistics.mean(cycle_times)) if cycle_times else None,
+        "cycle_p50_s": rounded(statistics.median(cycle_times)) if cycle_times else None,
+        "cycle_max_s": rounded(max(cycle_times)) if cycle_times else None,
+        "elapsed_s": rounded(elapsed),
+        "probes": probes,
+        "probes_per_s": rounded(probes / elapsed, 1),
+        "results": results,
+        "loss_pct": rounded(100.0 * lost / results, 2) if results else None,
+        "missed_ticks": scheduler.missed_ticks,
+        "cpu_s": rounded(cpu),
+        "cpu_us_per_probe": rounded(1e6 * cpu / probes, 1) if probes else None,
+        "rss_start_mb": rounded(rss_before, 1),
+        "rss_end_mb": rounded(rss_after, 1),
+        # ru_maxrss is KB on Linux
+        "peak_rss_mb": rounded(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1000.0, 1),
+        "first_result_s": rounded(first_result),
+        "all_results_s": rounded(all_results),
+        # Replies per source vs probes the responder saw arrive from that address
+        "sources": {source or "default": {"answered": count} for source, count in per_source.items()},
+        "received_from": received,
+    }
+
+
+def run_isolated(spec):
+    """Run a scenario in a fresh interpreter so its CPU and RSS aren't shared with others"""
+    process = subprocess.run([sys.executable, os.path.abspath(__file__), "--run-scenario", json.dumps(spec)],
+                             stdout=subprocess.PIPE, universal_newlines=True,
+                             timeout=spec["max_seconds"] + spec["timeout"] + 60)
+    if process.returncode != 0:
+        return {"scenario": scenario_name(spec),
+                "error": f"exit status {process.returncode}"}
+    return json.loads(process.stdout.strip().splitlines()[-1])
+
+
+def raise_fd_limit(needed):
+    """Raise the open file limit towards needed; returns the limit in force"""
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if soft < needed:
+        wanted = needed if hard == resource.RLIM_INFINITY else min(needed, hard)
+        try:
+            resource.setrlimit(resource.RLIMIT_NOFILE, (wanted, hard))
+            soft = wanted
+        except (ValueError, OSError):
+            pass
+    return soft
+
+
+def environment():
+    """What the numbers were measured on"""
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], stdout=subprocess.PIPE,
+                                stderr=subprocess.DEVNULL, universal_newlines=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        commit = None
+    return {
+        "time": time.time(),
+        "commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+    }
+
+
+def print_row(row):
+    if "error" in row:
+        print(f"{row['scenario']:<22} {row['error']}")
+        return
+
+    def ms(value):
+        return f"{value * 1000:.0f}" if value is not None else "-"
+
+    print(f"{row['scenario']:<22} {row['cycles']:>6} {ms(row['cycle_first_s']):>9} "
+          f"{ms(row['cycle_mean_s']):>9} {ms(row['cycle_max_s']):>9} {row['probes_per_s']:>9.0f} "
+          f"{row['cpu_s']:>7.2f} {row['cpu_us_per_probe'] or 0:>8.0f} {row['peak_rss_mb']:>8.1f} "
+          f"{ms(row['first_result_s']):>8} {ms(row['all_results_s']):>8} {row['loss_pct'] or 0:>6.1f}")
+    if len(row.get("sources") or {}) > 1:
+        answered = " ".join(f"{source} {stats['answered']}" for source, stats in row["sources"].items())
+        received = " ".join(f"{address} {count}" for address, count in (row["received_from"] or {}).items())
+        print(f"{'':<22} answered: {answered} | responder saw: {received}")
+
+
+def compare(old, new):
+    """Print the change of each metric for scenarios in both runs"""
+    before = {row["scenario"]: row for row in old["results"] if "error" not in row}
+    print(f"\nagainst {old['environment'].get('commit') or 'previous run'}:")
+    for row in new["results"]:
+        previous = before.get(row["scenario"])
+        if previous is None or "error" in row:
+            continue
+        changes = []
+        for metric, higher_is_better in COMPARED:
+            a, b = previous.get(metric), row.get(metric)
+            if not a or b is None:
+                continue
+            change = 100.0 * (b - a) / a
+            worse = change < 0 if higher_is_better else change > 0
+            changes.append(f"{metric} {change:+.1f}%{'!' if worse and abs(change) > 10 else ''}")
+        print(f"{row['scenario']:<22} " + "  ".join(changes))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--targets", type=int, nargs="+", default=[10, 100, 1000, 10000])
+    parser.add_argument("--networks", nargs="+", choices=sorted(NETWORKS), default=["internet", "lossy"])
+    parser.add_argument("--modes", nargs="+", choices=["sim", "udp"], default=["sim", "udp"])
+    parser.add_argument("--cycles", type=int, default=3, help="cycles per scenario")
+    parser.add_argument("--interval", type=float, default=1.0)
+    parser.add_argument("--timeout", type=float, default=1.0)
+    parser.add_argument("--concurrency", type=int, default=256)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--sources", nargs="+", default=None,
+                        help="local addresses to probe every udp target from, e.g. 127.0.0.1 127.0.0.2")
+    parser.add_argument("--max-seconds", type=float, default=120.0, help="cut a scenario short after this")
+    parser.add_argument("--output", default=None, help="write the results as JSON")
+    parser.add_argument("--compare", default=None, help="earlier --output file to compare against")
+    parser.add_argument("--run-scenario", default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run_scenario:
+        spec = json.loads(args.run_scenario)
+        raise_fd_limit(spec["targets"] + spec["concurrency"] + 256)
+        print(json.dumps(run_scenario(spec)))
+        return
+
+    print(f"{'scenario':<22} {'cycles':>6} {'first ms':>9} {'mean ms':>9} {'max ms':>9} {'probes/s':>9} "
+          f"{'cpu s':>7} {'cpu us/p':>8} {'rss MB':>8} {'1st ms':>8} {'all ms':>8} {'loss%':>6}")
+    rows = []
+    for mode in args.modes:
+        for network in args.networks:
+            for count in args.targets:
+                spec = {"mode": mode, "network": network, "targets": count, "cycles": args.cycles,
+                        "interval": args.interval, "timeout": args.timeout,
+                        "concurrency": args.concurrency, "seed": args.seed,
+                        "max_seconds": args.max_seconds, "sources": args.sources}
+                if mode == "udp" and raise_fd_limit(count + args.concurrency + 256) < count + args.concurrency + 256:
+                    row = {"scenario": scenario_name(spec), "error": "skipped: open file limit too low"}
+                else:
+                    row = run_isolated(spec)
+                rows.append(row)
+                print_row(row)
+                sys.stdout.flush()
+
+    report = {"environment": environment(), "settings": vars(args), "results": rows}
+    del report["settings"]["run_scenario"]
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            compare(json.load(f), report)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Benchmark: server list build and scroll cost at 50, 500 and 5000 targets
+
+Compares the old widget-per-row list (one Frame + two Labels per server in a
+scrolling Canvas) with the virtualized VirtualServerList. Needs a display -
+run it under Xvfb on a headless box:
+
+xvfb-run -a python benchmarks/bench_list_build.py
+"""
+
+import argparse
+import os
+import sys
+import time
+import tkinter as tk
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ping_list_view import VirtualServerList
+
+
+def make_categories(count):
+    """Four categories of synthetic targets, like the real server list"""
+    servers = [f"10.{i // 65536}.{(i // 256) % 256}.{i % 256}" for i in range(count)]
+    quarter = max(1, count // 4)
+    return {
+        "General": servers[:quarter],
+        "Counter-Strike 2": servers[quarter:2 * quarter],
+        "Steam Content": servers[2 * quarter:3 * quarter],
+        "DNS & Infrastructure": servers[3 * quarter:],
+    }
+
+
+def build_widget_list(parent, categories):
+    """The pre-virtualization list: every row is a live Frame with two Labels"""
+    canvas = tk.Canvas(parent, bg='#111111', highlightthickness=0)
+    scrollbar = tk.Scrollbar(parent, orient="vertical", command=canvas.yview)
+    frame = tk.Frame(canvas, bg='black')
+    frame.bind("<Configure>", lambda e: canvas.configure(scrollregion=canvas.bbox("all")))
+    canvas.create_window((0, 0), window=frame, anchor="nw")
+    canvas.configure(yscrollcommand=scrollbar.set)
+    canvas.pack(side="left", fill="both", expand=True)
+    scrollbar.pack(side="right", fill="y")
+    row = 0
+    for category, servers in categories.items():
+        tk.Label(frame, text=category, font=("Courier New", 12, "bold")).grid(row=row, column=0)
+        row += 1
+        for i, server in enumerate(servers):
+            row_frame = tk.Frame(frame, bg='#1a1a1a' if i % 2 == 0 else '#151515')
+            row_frame.grid(row=row, column=0, sticky='ew')
+            tk.Label(row_frame, text=server, font=("Courier New", 10)).pack(side=tk.LEFT)
+            tk.Label(row_frame, text="-- ms", font=("Courier New", 10, "bold"), width=12).pack(side=tk.RIGHT)
+            row += 1
+        row += 2
+    return canvas.yview_scroll
+
+
+def build_virtual_list(parent, categories):
+    view = VirtualServerList(parent, categories)
+    return lambda units, what: view.scroll(units)
+
+
+def measure(builder, count, scroll_steps):
+    """Return (build seconds, seconds per scroll step) for one fresh window"""
+    root = tk.Tk()
+    root.geometry("500x750")
+    frame = tk.Frame(root, bg='black')
+    frame.pack(fill=tk.BOTH, expand=True)
+    categories = make_categories(count)
+
+    started = time.perf_counter()
+    scroll = builder(frame, categories)
+    root.update()  # Include geometry management and the first paint
+    build = time.perf_counter() - started
+
+    started = time.perf_counter()
+    for step in range(scroll_steps):
+        scroll(1 if step < scroll_steps // 2 else -1, "units")
+        root.update()
+    per_scroll = (time.perf_counter() - started) / scroll_steps
+    root.destroy()
+    return build, per_scroll
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--counts", type=int, nargs="+", default=[50, 500, 5000])
+    parser.add_argument("--scroll-steps", type=int, default=50)
+    parser.add_argument("--skip-widgets", action="store_true", help="only measure the virtual list")
+    args = parser.parse_args()
+
+    if not os.environ.get("DISPLAY") and sys.platform.startswith("linux"):
+        sys.exit("No DISPLAY - run under Xvfb: xvfb-run -a python benchmarks/bench_list_build.py")
+
+    print(f"{'targets':>8} {'list':>8} {'build ms':>10} {'scroll ms':>10}")
+    for count in args.counts:
+        builders = [("virtual", build_virtual_list)]
+        if not args.skip_widgets:
+            builders.insert(0, ("widgets", build_widget_list))
+        for name, builder in builders:
+            build, per_scroll = measure(builder, count, args.scroll_steps)
+            print(f"{count:>8} {name:>8} {build * 1000:>10.1f} {per_scroll * 1000:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Benchmark: probe cycle wall-time against simulated slow and blackholed targets
+
+Compares the old serial loop (one probe after another) with the concurrent
+ProbeScheduler. Targets are simulated - no packets leave the machine.
+
+Usage:
+python benchmarks/bench_probe_cycle.py [--targets 34] [--timeout 0.5]
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ping_engine import ProbeScheduler
+from ping_probers import Prober
+
+
+def make_targets(count, blackholed_share, slow_share, seed=1):
+    """Build a simulated network: target name -> latency in seconds (None = blackholed)"""
+    rng = random.Random(seed)
+    network = {}
+    for i in range(count):
+        roll = rng.random()
+        if roll < blackholed_share:
+            network[f"blackhole-{i}"] = None
+        elif roll < blackholed_share + slow_share:
+            network[f"slow-{i}"] = rng.uniform(0.15, 0.30)
+        else:
+            network[f"fast-{i}"] = rng.uniform(0.005, 0.05)
+    return network
+
+
+class SimulatedProber(Prober):
+    """Sleeps for the target latency, blackholed targets wait out the timeout"""
+
+    name = "simulated"
+
+    def __init__(self, network):
+        self.network = network
+
+    async def probe(self, target, timeout):
+        latency = self.network[target]
+        if latency is None or latency > timeout:
+            await asyncio.sleep(timeout)
+            return "error"
+        await asyncio.sleep(latency)
+        return latency * 1000.0
+
+
+async def serial_cycle(network, prober, timeout):
+    """The old monitor_pings behaviour: one probe after another"""
+    for target in network:
+        await prober.probe(target, timeout)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--targets", type=int, default=34)
+    parser.add_argument("--timeout", type=float, default=0.5)
+    parser.add_argument("--blackholed", type=float, default=0.4, help="share of blackholed targets")
+    parser.add_argument("--slow", type=float, default=0.2, help="share of slow targets")
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--cycles", type=int, default=3)
+    args = parser.parse_args()
+
+    network = make_targets(args.targets, args.blackholed, args.slow)
+    prober = SimulatedProber(network)
+    blackholed = sum(1 for latency in network.values() if latency is None)
+    print(f"targets={len(network)} blackholed={blackholed} timeout={args.timeout}s "
+          f"concurrency={args.concurrency}")
+
+    loop = asyncio.new_event_loop()
+    try:
+        started = time.perf_counter()
+        loop.run_until_complete(serial_cycle(network, prober, args.timeout))
+        serial = time.perf_counter() - started
+        print(f"serial     cycle: {serial:8.3f}s")
+
+        scheduler = ProbeScheduler(network, prober=prober, timeout=args.timeout,
+                                   concurrency=args.concurrency)
+        timings = []
+        for _ in range(args.cycles):
+            started = time.perf_counter()
+            loop.run_until_complete(scheduler.run_cycle())
+            timings.append(time.perf_counter() - started)
+        best = min(timings)
+        print(f"concurrent cycle: {best:8.3f}s (best of {args.cycles})  "
+              f"speedup x{serial / best:.1f}")
+    finally:
+        loop.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Benchmark: history database write throughput
+
+1. Sustained: 1000 samples/s spread over 100 targets for a few seconds -
+   reports the cost of record() on the probe path, the writer's backlog and
+   how long the final flush takes.
+2. Burst: queue a large number of samples at once and time how fast the
+   background writer drains them.
+
+Usage:
+python benchmarks/bench_storage_write.py [--rate 1000] [--seconds 5] [--burst 200000]
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ping_storage import PingStorage, StorageWriter
+
+
+def sustained(path, rate, seconds, targets):
+    """Feed rate samples/s for seconds; return stats about the probe-path cost and lag"""
+    writer = StorageWriter(path).start()
+    rng = random.Random(1)
+    names = [f"target-{i}" for i in range(targets)]
+    record_time = 0.0
+    max_backlog = 0
+    sent = 0
+    started = time.perf_counter()
+    base = time.time()
+    while True:
+        elapsed = time.perf_counter() - started
+        if elapsed >= seconds:
+            break
+        due = int(elapsed * rate)
+        while sent < due:
+            rtt = None if rng.random() < 0.05 else rng.uniform(5, 80)
+            t0 = time.perf_counter()
+            writer.record_sample(names[sent % targets], base + sent / rate, rtt)
+            record_time += time.perf_counter() - t0
+            sent += 1
+        max_backlog = max(max_backlog, writer.queue.qsize())
+        time.sleep(0.001)
+    flush_started = time.perf_counter()
+    writer.stop()
+    flush = time.perf_counter() - flush_started
+    return {
+        "sent": sent,
+        "written": writer.written,
+        "batches": writer.batches,
+        "record_us": 1e6 * record_time / max(sent, 1),
+        "max_backlog": max_backlog,
+        "final_flush_s": flush,
+    }
+
+
+def burst(path, count, targets):
+    """Queue count samples at once and time the drain"""
+    writer = StorageWriter(path, batch_size=5000, max_queued=count)
+    names = [f"burst-{i}" for i in range(targets)]
+    base = time.time() - count
+    for i in range(count):
+        writer.record_sample(names[i % targets], base + i * 0.001, 20.0 + i % 50)
+    started = time.perf_counter()
+    writer.start()
+    writer.stop()
+    elapsed = time.perf_counter() - started
+    return writer.written, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rate", type=int, default=1000, help="samples per second")
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--targets", type=int, default=100)
+    parser.add_argument("--burst", type=int, default=200000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.db")
+        stats = sustained(path, args.rate, args.seconds, args.targets)
+        print(f"sustained {args.rate}/s for {args.seconds:.0f}s: sent={stats['sent']} "
+              f"written={stats['written']} batches={stats['batches']}")
+        print(f"  record() cost {stats['record_us']:.2f}us  max backlog {stats['max_backlog']} "
+              f"final flush {stats['final_flush_s'] * 1000:.0f}ms")
+
+        written, elapsed = burst(path, args.burst, args.targets)
+        print(f"burst: {written} samples in {elapsed:.2f}s = {written / elapsed:,.0f} samples/s")
+
+        storage = PingStorage(path)
+        started = time.perf_counter()
+        now = time.time()
+        rows = storage.rollup("target-0", "1m", now - 3600, now + 60)
+        query_ms = (time.perf_counter() - started) * 1000
+        storage.close()
+        size = sum(os.path.getsize(os.path.join(tmp, f)) for f in os.listdir(tmp))
+        print(f"1m rollup query for one target: {len(rows)} rows in {query_ms:.2f}ms  "
+              f"database size {size / 1e6:.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
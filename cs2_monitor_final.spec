@@ -20,7 +20,9 @@ a = Analysis(
     hookspath=[],
     hooksconfig={},
     runtime_hooks=[],
-    excludes=[],
+    # Never imported by the app - less to unpack and scan on every start
+    excludes=['unittest', 'doctest', 'pdb', 'pydoc', 'pydoc_data', 'lib2to3', 'distutils',
+              'setuptools', 'tkinter.test', 'test', 'xmlrpc'],
     win_no_prefer_redirects=False,
     win_private_assemblies=False,
     cipher=block_cipher,
@@ -40,7 +42,7 @@ exe = EXE(
     debug=False,
     bootloader_ignore_signals=False,
     strip=False,
-    upx=True,
+    upx=False,  # UPX-packed DLLs are decompressed on every start (and trip antivirus scans)
     upx_exclude=[],
     runtime_tmpdir=None,
     console=False,  # CRITICAL: No console window
@@ -6,6 +6,10 @@ for official Counter-Strike 2 servers across Europe.
 
 Features:
 - Continuous ping monitoring every 1 second with 3s timeout
+- All servers probed in parallel - a full cycle takes about one timeout
+- In-process ICMP over one shared socket (falls back to the ping binary)
+- Rolling 1-hour history per server (min/avg/max, jitter, loss, p50/p95/p99)
+- Every result saved to ping_history.db (SQLite) - query it with ping_storage.py
 - Enhanced dark theme with borders, gradients, and alternating row colors
 - Solid window (no transparency) with universal drag functionality
 - Official CS2 servers (Valve IPs) across all European countries
@@ -13,12 +17,35 @@ Features:
 - Modern UI with enhanced typography (Courier New font family)
 - Click anywhere to drag - smart cursor feedback
 - Enhanced scrollable interface with universal mouse wheel support
-- Keyboard shortcuts (F5 refresh, Space toggle topmost, ESC exit)
+- Virtualized server list - only visible rows are drawn, so hundreds of
+  targets cost no more than a handful
+- Best CS2 region and runner-up, scored from median RTT, jitter and loss over
+  the last minute of samples, with hysteresis (also saved to best_server.json
+  for launcher scripts - see ping_recommend.py)
+- Server list in servers.json - edit it while running, changes apply within
+  a couple of seconds (duplicate endpoints are probed once)
+- Multi-path probing - with "sources" in servers.json every server is probed
+  from each local address / interface (uplinks, VPN) and the results are
+  shown side by side in its row
+- Keyboard shortcuts (F5 refresh visible, Shift+F5 refresh all, F3 render stats,
+  F4 profiler overlay, Space toggle topmost, ESC exit)
+- Built-in profiler (F4) - per-stage engine timings, cycle load, rows changed per frame
+  and CPU per probe in an overlay, saved to ping_profile.json when switched off
+  (see ping_profiler.py)
+- Alerts as toasts when a server goes down or comes back, its ping crosses
+  its threshold or loss spikes (servers.json "alerts"), logged to
+  ping_events.jsonl and optionally POSTed to a webhook (see ping_events.py)
+- Batched UI updates - only changed labels are redrawn, once per 100ms frame
+- Fast cold start - probing starts before the window exists, a skeleton window
+  is painted first and the list and icon are filled in right after
 - Right-click context menu with refresh and exit options
-- Non-blocking UI using threading
+- Non-blocking UI - the asyncio probe engine (ping_engine.py) runs on its own
+  thread and keeps a latest-state table; Tk takes what changed from it once
+  per 100ms frame (LatestState.take_changes) instead of draining a queue
 
 IMPORTANT: CS2 servers often show "ERROR" because they block ping requests for security.
-This is NORMAL - use the CS2 game client to test actual connectivity.
+This is NORMAL - probe them over TCP/UDP instead (e.g. "a2s://IP:27015", see
+ping_probers.py) or use the CS2 game client to test actual connectivity.
 
 Enhanced UI Colors:
 - 🟢 Green: Excellent ping (<100ms) - Perfect for gaming
@@ -27,12 +54,21 @@ Enhanced UI Colors:
 - Enhanced backgrounds and borders for better readability
 
 Requirements:
-- Python 3.6+
+- Python 3.7+
 - tkinter (built-in)
 - Works best with stable internet connection
 
 Usage:
 python floating_ping_monitor.py
+python floating_ping_monitor.py --metrics-port 9464
+    (also serve Prometheus/OpenMetrics on http://127.0.0.1:9464/metrics -
+    see ping_exporter.py)
+python floating_ping_monitor.py --webhook http://127.0.0.1:8080/cs2
+    (POST every alert event as JSON)
+python floating_ping_monitor.py --startup-timings
+    (print how long each startup phase took)
+python floating_ping_monitor.py --headless [--format jsonl|csv] [--output FILE]
+    (no window, tkinter is never imported - see ping_headless.py)
 
 CS2 Official Servers: France, Germany, Luxembourg, UK, Sweden, Spain, Austria, Belgium
 """
@@ -41,8 +77,14 @@ CS2 Official Servers: France, Germany, Luxembourg, UK, Sweden, Spain, Austria, B
 import sys
 import os
 import platform
+import time
+
+LAUNCHED = time.monotonic()  # startup phases are timed from here
+
+# Headless mode streams to the console, so it keeps it (and skips tkinter)
+HEADLESS = "--headless" in sys.argv[1:]
 
-if platform.system() == "Windows":
+if platform.system() == "Windows" and not HEADLESS:
     import ctypes
     # Hide console window immediately
     ctypes.windll.user32.ShowWindow(ctypes.windll.kernel32.GetConsoleWindow(), 0)
@@ -50,51 +92,206 @@ if platform.system() == "Windows":
     if hasattr(sys, '_MEIPASS'):
         ctypes.windll.kernel32.FreeConsole()
 
-import tkinter as tk
-from tkinter import ttk
-import threading
-import time
-import subprocess
+import queue
 from collections import defaultdict
 
-class FloatingPingMonitor:
+from ping_engine import MonitorCore
+from ping_events import EventLog, Webhook, describe
+from ping_probers import split_source
+from ping_profiler import PROFILE_FILE, profiler
+from ping_recommend import write_json
+from ping_targets import DEFAULT_SOURCE, TargetRegistry, app_dir
+
+FRAME_MS = 100  # UI frame tick - changed labels are applied in one batch per frame
+HISTORY_DB = "ping_history.db"  # Probe history, next to the script / executable
+RELOAD_MS = 2000  # how often servers.json is checked for changes
+RECOMMENDATION_FILE = "best_server.json"  # best region for launcher scripts, next to the app
+EVENTS_FILE = "ping_events.jsonl"  # alert events, next to the app
+TOAST_MS = 4000  # how long an alert toast stays up
+
+# tkinter and the Tk widgets are imported by load_gui() - never in headless mode
+tk = None
+VirtualServerList = None
+
+
+def load_gui():
+    """Import tkinter and the Tk widgets on first use"""
+    global tk, VirtualServerList
+    import tkinter
+    from ping_list_view import VirtualServerList as list_view
+    tk = tkinter
+    VirtualServerList = list_view
+
+
+class FrameStats:
+    """Counts Tk callbacks and label updates and times each UI frame"""
+
     def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.started = time.monotonic()
+        self.callbacks = 0       # Tk callbacks run by the render path
+        self.frames = 0          # frames that had something to apply
+        self.results = 0         # results taken from the engine
+        self.label_updates = 0   # label.config calls actually made
+        self.frame_time = 0.0    # seconds spent applying frames
+        self.max_frame_time = 0.0
+
+    def record(self, duration, results, label_updates):
+        self.callbacks += 1
+        if results:
+            self.frames += 1
+        self.results += results
+        self.label_updates += label_updates
+        self.frame_time += duration
+        self.max_frame_time = max(self.max_frame_time, duration)
+
+    def summary(self):
+        """One-line summary for the status bar"""
+        elapsed = max(time.monotonic() - self.started, 1e-9)
+        avg_ms = 1000.0 * self.frame_time / self.callbacks if self.callbacks else 0.0
+        return (f"🖼 {self.callbacks / elapsed:.0f} cb/s | {self.label_updates / elapsed:.1f} upd/s | "
+                f"{avg_ms:.2f}ms avg {1000.0 * self.max_frame_time:.1f}ms max")
+
+class SourceColumns:
+    """Side-by-side ping text for rows probed from several sources (servers.json "sources")"""
+
+    def __init__(self, sources=()):
+        self.configure(sources)
+
+    def configure(self, sources):
+        self.sources = list(sources)
+        self.widths = [max(len(source), 5) for source in self.sources]  # "ERROR" fits
+        self.cells = {}  # row -> {source: (text, rtt or None, color)}
+
+    def header(self):
+        """Source names lined up over the columns (Courier is monospaced)"""
+        return " ".join(f"{source:>{width}}" for source, width in zip(self.sources, self.widths))
+
+    def update(self, row, source, text, rtt, color):
+        """Record one source's value; returns the row's combined (text, color)
+
+        The row takes the color of its fastest answering path.
+        """
+        cells = self.cells.setdefault(row, {})
+        cells[source] = (text, rtt, color)
+        text = " ".join(f"{cells[name][0] if name in cells else '--':>{width}}"
+                        for name, width in zip(self.sources, self.widths))
+        answered = [cell for cell in cells.values() if cell[1] is not None]
+        if answered:
+            color = min(answered, key=lambda cell: cell[1])[2]
+        return text, color
+
+class StartupTimings:
+    """Time from launch to each startup phase"""
+
+    PHASES = ("imports", "engine", "window", "painted", "list", "icon", "first result")
+
+    def __init__(self, launched=LAUNCHED):
+        self.launched = launched
+        self.phases = {}  # phase -> seconds after launch
+        self.reported = False
+
+    def mark(self, phase):
+        self.phases.setdefault(phase, time.monotonic() - self.launched)
+
+    def complete(self):
+        return len(self.phases) == len(self.PHASES)
+
+    def summary(self):
+        """One line, phases in the order they finished"""
+        marks = sorted(self.phases.items(), key=lambda item: item[1])
+        return "Startup: " + " | ".join(f"{phase} {seconds * 1000:.0f}ms" for phase, seconds in marks)
+
+class FloatingPingMonitor:
+    def __init__(self, metrics_port=None, startup=None, print_startup=False, webhook=None):
         # Additional console hiding for PyInstaller
         if platform.system() == "Windows" and hasattr(sys, '_MEIPASS'):
             import ctypes
             ctypes.windll.kernel32.FreeConsole()
-        
+        self.startup = startup or StartupTimings()
+        self.print_startup = print_startup
+
+        # Start the probe engine first - all servers probed in parallel, one cycle per
+        # second - so the first replies are in flight while the window is being built
+        self.setup_servers()
+        self.columns = SourceColumns(self.registry.sources)
+        self.running = True
+        from ping_storage import StorageWriter  # sqlite3 only for the window, never headless
+        self.storage = StorageWriter(os.path.join(app_dir(), HISTORY_DB)).start()
+        self.monitor = MonitorCore(self.servers, interval=1.0, timeout=3.0, queue_results=False,
+                                   storage=self.storage, intervals=self.registry.intervals(),
+                                   priority=self.registry.priority(), regions=self.registry.regions(),
+                                   alerts=self.registry.alerts(), pins=self.registry.pins())
+        # Alert events: toasts (taken on the frame tick), the log file and an optional webhook
+        self.event_queue = queue.Queue()
+        stream = self.monitor.events.stream
+        stream.subscribe(self.event_queue.put)
+        self.event_log = None
+        try:
+            self.event_log = stream.subscribe(EventLog(os.path.join(app_dir(), EVENTS_FILE)))
+        except OSError as e:
+            print(f"Error opening {EVENTS_FILE}: {e}")
+        if webhook is not None:
+            stream.subscribe(Webhook(webhook))
+        self.monitor.start()
+        self.exporter = None
+        if metrics_port is not None:
+            from ping_exporter import MetricsServer
+            try:
+                self.exporter = MetricsServer(self.monitor, metrics_port).start()
+            except OSError as e:
+                print(f"Error starting metrics endpoint on port {metrics_port}: {e}")
+        self.startup.mark("engine")
+
+        # Skeleton window: frames and labels only, the list is filled in after the first paint
+        load_gui()
         self.root = tk.Tk()
         self.setup_window()
-        self.setup_servers()
         self.setup_ui()
         self.ping_data = defaultdict(lambda: {"status": "Unknown", "last_ping": 0})
-
-        # Start ping monitoring thread
-        self.running = True
-        self.monitor_thread = threading.Thread(target=self.monitor_pings, daemon=True)
-        self.monitor_thread.start()
+        self.frame_stats = FrameStats()
+        self.show_frame_stats = False
+        self.profile_panel = None  # overlay label, built on the first F4
+        self.bursts_seen = 0
+        self.recommendation_seen = 0
+        self.toast_shown = 0  # toasts shown so far - a hide timer only hides its own toast
+        self.root.after(FRAME_MS, self.render_frame)
+        self.reload_error = self.registry.error
+        self.root.after(RELOAD_MS, self.reload_servers)
 
         # Make window draggable
         self.setup_drag_functionality()
-
-    def setup_window(self):
-        """Configure the main window properties"""
-        self.root.title("CS2 Ping Monitor - Official")
-
-        # Set window icon if available
+        self.startup.mark("window")
+        # after_idle runs once Tk is idle - i.e. once the skeleton has been drawn
+        self.root.after_idle(lambda: self.root.after(0, self.finish_startup))
+
+    def finish_startup(self):
+        """Fill in the parts the first paint didn't wait for: the server list and the icon"""
+        self.startup.mark("painted")
+        self.server_list.set_categories(self.registry.categories(), self.columns.header())
+        self.startup.mark("list")
+        self.load_icon()
+        self.startup.mark("icon")
+
+    def load_icon(self):
+        """Set the window icon from the icons/ folder if available"""
         try:
             self.root.iconbitmap("icons/icon.ico")  # Windows icon
-        except:
+        except tk.TclError:
             try:
                 # Try different icon formats if ICO fails
                 icon_path = "icons/icon.png"
                 if os.path.exists(icon_path):
-                    icon_img = tk.PhotoImage(file=icon_path)
-                    self.root.iconphoto(True, icon_img)
-            except:
+                    self.icon_img = tk.PhotoImage(file=icon_path)  # Keep a reference for Tk
+                    self.root.iconphoto(True, self.icon_img)
+            except tk.TclError:
                 pass  # Use default icon if no custom icon found
-        self.root.geometry("500x750")
+
+    def setup_window(self):
+        """Configure the main window properties (the icon is loaded after the first paint)"""
+        self.root.title("CS2 Ping Monitor - Official")
         self.root.resizable(False, False)
 
         # Remove window decorations for floating effect
@@ -130,59 +327,40 @@ class FloatingPingMonitor:
         self.center_window()
 
     def center_window(self):
-        """Center the window on the screen"""
-        self.root.update_idletasks()
+        """Size the window and center it on the screen
+
+        The size is fixed, so no layout pass (update_idletasks) is needed first.
+        """
         screen_width = self.root.winfo_screenwidth()
         screen_height = self.root.winfo_screenheight()
         x = (screen_width - 500) // 2
         y = (screen_height - 750) // 2
-        self.root.geometry(f"+{x}+{y}")
+        self.root.geometry(f"500x750+{x}+{y}")
 
     def setup_servers(self):
-        """Define the list of servers to monitor"""
-        self.servers = [
-            # General Servers
-            "google.com",              # Google
-            "cloudflare.com",          # Cloudflare
-            "youtube.com",             # YouTube
-            "twitch.tv",               # Twitch
-            "github.com",              # GitHub
-            "stackoverflow.com",       # Stack Overflow
-            "discord.com",             # Discord
-            "steamcommunity.com",      # Steam Community
-
-            # Counter-Strike 2 Servers - Europe (Official IPs)
-            "146.66.152.1",     # CS2 Stockholm, Sweden
-            "155.133.232.1",    # CS2 Luxembourg, EU West
-            "155.133.248.1",    # CS2 Vienna, Austria
-            "185.25.182.1",     # CS2 Paris, France
-            "185.40.64.1",      # CS2 Frankfurt, Germany
-            "185.93.2.1",       # CS2 London, UK
-            "146.66.155.1",     # CS2 Madrid, Spain
-            "146.66.158.1",     # CS2 Stockholm, Sweden (Backup)
-            "155.133.226.1",    # CS2 Luxembourg (Backup)
-            "155.133.242.1",    # CS2 Vienna (Backup)
-            "185.25.176.1",     # CS2 Paris (Backup)
-            "185.40.65.1",      # CS2 Frankfurt (Backup)
-            "185.93.3.1",       # CS2 London (Backup)
-
-            # Steam Content Servers - Europe
-            "eu1.steamcontent.com",          # Steam EU 1
-            "eu2.steamcontent.com",          # Steam EU 2
-            "eu3.steamcontent.com",          # Steam EU 3
-            "eu4.steamcontent.com",          # Steam EU 4
-            "eu5.steamcontent.com",          # Steam EU 5
-            "eu6.steamcontent.com",          # Steam EU 6
-            "eu7.steamcontent.com",          # Steam EU 7
-            "eu8.steamcontent.com",          # Steam EU 8
-
-            # European DNS & Infrastructure
-            "8.8.8.8",                       # Google DNS
-            "1.1.1.1",                       # Cloudflare DNS
-            "185.25.182.1",                  # France DNS
-            "185.40.64.1",                   # Germany DNS
-            "185.93.2.1",                    # UK DNS
-        ]
+        """Load the list of servers to monitor from servers.json (see ping_targets.py)"""
+        self.registry = TargetRegistry()
+        self.servers = self.registry.targets()
+
+    def reload_servers(self):
+        """Apply edits to servers.json without restarting or rebuilding the window"""
+        if not self.running:
+            return
+        changes = self.registry.poll()
+        if changes is not None:
+            added, removed = changes
+            self.servers = self.registry.targets()
+            self.monitor.set_targets(self.servers, self.registry.intervals(), self.registry.priority(),
+                                     self.registry.regions(), self.registry.alerts(), self.registry.pins())
+            if self.registry.sources != self.columns.sources:
+                self.columns.configure(self.registry.sources)
+            self.server_list.set_categories(self.registry.categories(), self.columns.header())
+            self.status_label.config(text=f"📝 Server list reloaded: +{len(added)} -{len(removed)}", fg="#8888ff")
+            self.root.after(2000, lambda: self.status_label.config(text="🔴 Monitoring Active - Live Updates", fg="#00ff88"))
+        elif self.registry.error and self.registry.error != self.reload_error:
+            self.status_label.config(text="⚠ servers.json has errors - keeping the old list", fg="#ff0000")
+        self.reload_error = self.registry.error
+        self.root.after(RELOAD_MS, self.reload_servers)
 
     def setup_ui(self):
         """Create the user interface"""
@@ -210,116 +388,26 @@ class FloatingPingMonitor:
         )
         subtitle_label.pack(pady=(0, 15))
 
-        # Server labels frame with scroll and enhanced styling
-        self.server_frame = tk.Frame(self.main_container, bg='black')
-        self.server_frame.pack(fill=tk.BOTH, expand=True, pady=(10, 0))
-
-        # Create canvas for scrolling with enhanced styling
-        self.canvas = tk.Canvas(
-            self.server_frame,
-            bg='#111111',  # Darker background for canvas
-            highlightthickness=0,
-            relief='sunken',
-            bd=1
-        )
-        scrollbar = tk.Scrollbar(
-            self.server_frame,
-            orient="vertical",
-            command=self.canvas.yview,
-            bg='#333333',
-            troughcolor='#222222',
-            width=20
-        )
-        self.scrollable_frame = tk.Frame(
-            self.canvas,
-            bg='black',
+        # Best region recommendation
+        self.best_label = tk.Label(
+            self.main_container,
+            text="🏆 Best region: measuring...",
+            font=("Courier New", 10, "bold"),
+            fg="#ffaa00",  # Orange
+            bg='#111111',
+            relief='ridge',
+            bd=1,
             padx=10,
-            pady=10
-        )
-
-        self.scrollable_frame.bind(
-            "<Configure>",
-            lambda e: self.canvas.configure(scrollregion=self.canvas.bbox("all"))
+            pady=3
         )
+        self.best_label.pack(fill=tk.X)
 
-        self.canvas.create_window((0, 0), window=self.scrollable_frame, anchor="nw")
-        self.canvas.configure(yscrollcommand=scrollbar.set)
-
-        self.canvas.pack(side="left", fill="both", expand=True)
-        scrollbar.pack(side="right", fill="y")
-
-        # Create labels for each server
-        self.server_labels = {}
-        self.category_labels = {}
-
-        # Create categories
-        categories = {
-            "🌐 General Servers": self.servers[:9],
-            "🔫 Counter-Strike 2 (Official)": self.servers[9:22],
-            "🚂 Steam Content Servers (EU)": self.servers[22:30],
-            "🔧 DNS & Infrastructure": self.servers[30:]
-        }
-
-        row = 0
-        for category, servers_in_cat in categories.items():
-            # Category title with enhanced styling
-            cat_label = tk.Label(
-                self.scrollable_frame,
-                text=f"📡 {category}",
-                font=("Courier New", 12, "bold"),
-                fg="#ffaa00",  # Orange
-                bg='#222222',  # Dark gray background
-                relief='raised',
-                bd=1,
-                padx=8,
-                pady=3,
-                anchor='w'
-            )
-            cat_label.grid(row=row, column=0, columnspan=2, sticky='ew', pady=(15, 8))
-            row += 1
-
-            # Servers in category with enhanced styling
-            for i, server in enumerate(servers_in_cat):
-                # Background frame for each server row
-                server_bg = tk.Frame(
-                    self.scrollable_frame,
-                    bg='#1a1a1a' if i % 2 == 0 else '#151515',  # Alternating backgrounds
-                    relief='flat',
-                    bd=1
-                )
-                server_bg.grid(row=row, column=0, columnspan=2, sticky='ew', padx=5, pady=1)
-
-                # Server name label
-                server_label = tk.Label(
-                    server_bg,
-                    text=f"🔹 {server}",
-                    font=("Courier New", 10),
-                    fg="#ffffff",  # White
-                    bg=server_bg.cget('bg'),
-                    anchor='w',
-                    padx=10,
-                    pady=3
-                )
-                server_label.pack(side=tk.LEFT, fill=tk.X, expand=True)
-
-                # Ping result label with enhanced styling
-                ping_label = tk.Label(
-                    server_bg,
-                    text="-- ms",
-                    font=("Courier New", 10, "bold"),
-                    fg="#00ff88",  # Bright mint green
-                    bg=server_bg.cget('bg'),
-                    anchor='e',
-                    width=12,
-                    padx=10,
-                    pady=3
-                )
-                ping_label.pack(side=tk.RIGHT)
-
-                self.server_labels[server] = ping_label
-                row += 1
+        # Server labels frame with scroll and enhanced styling
+        self.server_frame = tk.Frame(self.main_container, bg='black')
+        self.server_frame.pack(fill=tk.BOTH, expand=True, pady=(10, 0))
 
-            row += 2  # Extra space between categories
+        # Virtualized list - only the rows in view are drawn; rows are added in finish_startup()
+        self.server_list = VirtualServerList(self.server_frame)
 
         # Status indicator with enhanced styling
         self.status_label = tk.Label(
@@ -359,6 +447,20 @@ class FloatingPingMonitor:
         )
         footer.pack(fill=tk.X, pady=(5, 0))
 
+        # Alert toast, placed over the bottom of the list while shown
+        self.toast_label = tk.Label(
+            self.main_container,
+            font=("Courier New", 9, "bold"),
+            fg="#ffffff",
+            bg='#333333',
+            relief='ridge',
+            bd=1,
+            padx=10,
+            pady=4,
+            wraplength=440,
+            justify=tk.LEFT
+        )
+
     def setup_drag_functionality(self):
         """Make the window draggable with enhanced functionality"""
         def start_drag(event):
@@ -384,6 +486,8 @@ class FloatingPingMonitor:
         def show_context_menu(event):
             context_menu = tk.Menu(self.root, tearoff=0, bg='#333333', fg='white', font=("Courier New", 9))
             context_menu.add_command(label="🔄 Refresh Data", command=self.refresh_data, font=("Courier New", 9))
+            context_menu.add_command(label="👁 Refresh Visible", command=lambda: self.refresh_data(visible_only=True),
+                                     font=("Courier New", 9))
             context_menu.add_separator()
             context_menu.add_command(label="❌ Exit", command=self.quit, font=("Courier New", 9))
             context_menu.post(event.x_root, event.y_root)
@@ -395,105 +499,162 @@ class FloatingPingMonitor:
         self.root.bind("<Button-3>", show_context_menu)  # Right-click context menu
 
         # Enhanced mouse wheel scrolling
-        self.canvas.bind_all("<MouseWheel>", lambda e: self.canvas.yview_scroll(int(-1*(e.delta/120)), "units"))
-        self.scrollable_frame.bind("<MouseWheel>", lambda e: self.canvas.yview_scroll(int(-1*(e.delta/120)), "units"))
-        self.canvas.bind("<Enter>", lambda e: self.canvas.focus_set())  # Allow mouse wheel on canvas
+        canvas = self.server_list.canvas
+        canvas.bind_all("<MouseWheel>", lambda e: self.server_list.scroll(int(-1*(e.delta/120))))
+        canvas.bind_all("<Button-4>", lambda e: self.server_list.scroll(-1))  # X11 wheel up
+        canvas.bind_all("<Button-5>", lambda e: self.server_list.scroll(1))   # X11 wheel down
+        canvas.bind("<Enter>", lambda e: canvas.focus_set())  # Allow mouse wheel on canvas
 
         # Keyboard shortcuts
         self.root.bind("<Escape>", lambda e: self.quit())
-        self.root.bind("<F5>", lambda e: self.refresh_data())  # F5 to refresh
+        self.root.bind("<F5>", lambda e: self.refresh_data(visible_only=True))  # F5 to refresh the rows in view
+        self.root.bind("<Shift-F5>", lambda e: self.refresh_data())  # Shift+F5 to refresh everything
         self.root.bind("<space>", lambda e: self.toggle_topmost())  # Space to toggle always on top
-
-    def ping_server(self, server):
-        """Ping a server and return the response time or error status"""
-        try:
-            if platform.system() == "Windows":
-                # Windows ping command with longer timeout for distant servers
-                command = ['ping', '-n', '1', '-w', '3000', server]  # 3 seconds timeout
-                # Hide console window for subprocess
-                startupinfo = subprocess.STARTUPINFO()
-                startupinfo.dwFlags |= subprocess.STARTF_USESHOWWINDOW
-                startupinfo.wShowWindow = subprocess.SW_HIDE
-                result = subprocess.run(command, capture_output=True, text=True, timeout=4, 
-                                      startupinfo=startupinfo, creationflags=subprocess.CREATE_NO_WINDOW)
-                if result.returncode == 0:
-                    # Parse ping output to extract time
-                    output = result.stdout
-                    if "time=" in output:
-                        time_str = output.split("time=")[1].split("ms")[0].strip()
-                        return float(time_str)
-                    else:
-                        return "timeout"
-                else:
-                    return "error"
+        self.root.bind("<F3>", lambda e: self.toggle_frame_stats())  # F3 to show render stats
+        self.root.bind("<F4>", lambda e: self.toggle_profiler())  # F4 to profile the engine and UI
+
+    def render_frame(self):
+        """Apply every result that changed since the last frame in one batch"""
+        if not self.running:
+            return
+        started = time.perf_counter()
+        changes = self.monitor.latest.take_changes()
+        updates = 0
+        for result in changes.values():
+            updates += self.handle_ping_result(result)
+        duration = time.perf_counter() - started
+        if changes and not self.startup.reported:
+            self.startup.mark("first result")
+            if self.startup.complete():
+                self.startup.reported = True
+                if self.print_startup:
+                    print(self.startup.summary())
+        self.frame_stats.record(duration, len(changes), updates)
+        if profiler.enabled:
+            profiler.stage("ui_frame", duration)
+            profiler.gauge("ui_queue", len(changes))
+            if self.frame_stats.callbacks % 5 == 0:
+                self.profile_panel.config(text=profiler.overlay_text())
+        if self.monitor.scheduler.bursts != self.bursts_seen:
+            self.show_burst_done()
+        if self.monitor.recommender.version != self.recommendation_seen:
+            self.show_recommendation()
+        if not self.event_queue.empty():
+            self.show_events()
+        if self.show_frame_stats and self.frame_stats.callbacks % 10 == 0:
+            probe_rate = self.monitor.scheduler.policy.probe_rate()
+            self.status_label.config(text=f"{self.frame_stats.summary()} | {probe_rate:.1f} probes/s",
+                                     fg="#8888ff")
+        self.root.after(FRAME_MS, self.render_frame)
+
+    def handle_ping_result(self, result):
+        """Record a probe result and update its label; returns 1 if the label changed"""
+        server = result.target
+        ping_time = result.value
+        tag = ""
+
+        if isinstance(ping_time, float):
+            # Successful ping
+            self.ping_data[server]["status"] = "online"
+            self.ping_data[server]["last_ping"] = ping_time
+            self.ping_data[server]["method"] = result.method
+            display_text = f"{ping_time:.0f}ms"
+            # Label TCP/UDP/A2S timings so they aren't mistaken for ICMP pings
+            if not result.method.startswith(("icmp", "subprocess")):
+                tag = result.method.split("-")[0].upper()
+            if ping_time > 100:
+                color = "#ffaa00"  # Orange for high ping
             else:
-                # Unix-like systems ping command with longer timeout for distant servers
-                command = ['ping', '-c', '1', '-W', '3', server]  # 3 seconds timeout
-                result = subprocess.run(command, capture_output=True, text=True, timeout=4)
-                if result.returncode == 0:
-                    # Parse ping output to extract time
-                    output = result.stdout
-                    if "time=" in output:
-                        time_str = output.split("time=")[1].split(" ")[0].strip()
-                        return float(time_str)
-                    else:
-                        return "timeout"
-                else:
-                    return "error"
-        except (subprocess.TimeoutExpired, subprocess.SubprocessError):
-            return "error"
-
-    def monitor_pings(self):
-        """Continuously monitor ping status for all servers"""
-        while self.running:
-            for server in self.servers:
-                try:
-                    ping_time = self.ping_server(server)
-
-                    if isinstance(ping_time, float):
-                        # Successful ping
-                        self.ping_data[server]["status"] = "online"
-                        self.ping_data[server]["last_ping"] = ping_time
-                        if ping_time > 100:
-                            display_text = f"{ping_time:.0f}ms"  # High ping
-                            color = "#ffaa00"  # Orange for high ping
-                        else:
-                            display_text = f"{ping_time:.0f}ms"  # Normal ping
-                            color = "#00ff00"  # Green for good ping
-                    elif ping_time == "timeout":
-                        # Timeout - server is slow or distant
-                        self.ping_data[server]["status"] = "slow"
-                        display_text = "SLOW"
-                        color = "#ffaa00"  # Orange
-                    else:
-                        # Error - server unreachable
-                        self.ping_data[server]["status"] = "error"
-                        display_text = "ERROR"
-                        color = "#ff0000"  # Red
-
-                    # Update UI in main thread
-                    self.root.after(0, self.update_ping_display, server, display_text, color)
-
-                except Exception as e:
-                    print(f"Error pinging {server}: {e}")
-                    self.root.after(0, self.update_ping_display, server, "ERROR", "#ff0000")
-
-            # Wait 1 second before next ping cycle
-            time.sleep(1)
+                color = "#00ff00"  # Green for good ping
+        elif ping_time == "timeout":
+            # Timeout - server is slow or distant
+            self.ping_data[server]["status"] = "slow"
+            display_text = "SLOW"
+            color = "#ffaa00"  # Orange
+        else:
+            # Error - server unreachable
+            self.ping_data[server]["status"] = "error"
+            display_text = "ERROR"
+            color = "#ff0000"  # Red
+
+        if self.columns.sources:
+            # One row per server, one column per source; the tag goes in front so the
+            # columns stay under their header
+            server, source = split_source(server)
+            display_text, color = self.columns.update(server, source or DEFAULT_SOURCE, display_text,
+                                                      ping_time if isinstance(ping_time, float) else None,
+                                                      color)
+            if tag:
+                display_text = f"{tag} {display_text}"
+        elif tag:
+            display_text += " " + tag
+        return self.update_ping_display(server, display_text, color)
 
     def update_ping_display(self, server, text, color):
-        """Update the ping display for a specific server"""
-        if server in self.server_labels:
-            self.server_labels[server].config(text=text, fg=color)
-
-    def refresh_data(self):
-        """Refresh all ping data"""
+        """Update the ping display for a specific server (skipped if nothing changed)"""
+        return 1 if self.server_list.set_value(server, text, color) else 0
+
+    def refresh_data(self, visible_only=False):
+        """Probe all servers (or only the ones in view) right now"""
+        servers = self.server_list.visible_servers() if visible_only else self.server_list.servers()
+        if not servers or not self.monitor.refresh(self.registry.expand(servers)):
+            return
         self.status_label.config(text="🔄 Refreshing Data...", fg="#ffaa00")
-        # Update all server labels to show refreshing state
-        for server, label in self.server_labels.items():
-            label.config(text="⟳", fg="#ffaa00")
-        # Reset status after a short delay
-        self.root.after(1000, lambda: self.status_label.config(text="🔴 Monitoring Active - Live Updates", fg="#00ff88"))
+        # Mark the refreshed rows until their fresh results arrive
+        for server in servers:
+            self.update_ping_display(server, "⟳", "#ffaa00")
+
+    def show_recommendation(self):
+        """Show the best region and runner-up and save them for launcher scripts"""
+        self.recommendation_seen = self.monitor.recommender.version
+        recommendation = self.monitor.recommender.recommendation()
+        best, runner_up = recommendation["best"], recommendation["runner_up"]
+        if best is None:
+            self.best_label.config(text="🏆 Best region: measuring...")
+        else:
+            text = f"🏆 Best: {best['region']} {best['median_ms']:.0f}ms{self.path_of(best)}"
+            if runner_up is not None:
+                text += f" | 2nd: {runner_up['region']} {runner_up['median_ms']:.0f}ms{self.path_of(runner_up)}"
+            self.best_label.config(text=text)
+        write_json(os.path.join(app_dir(), RECOMMENDATION_FILE), recommendation)
+
+    def path_of(self, ranked):
+        """Which source a ranked region was measured through, when several are probed"""
+        if not self.columns.sources:
+            return ""
+        return f" via {split_source(ranked['target'])[1] or DEFAULT_SOURCE}"
+
+    def show_events(self):
+        """Toast the newest alert events (several at once are shown together)"""
+        events = []
+        while True:
+            try:
+                events.append(self.event_queue.get_nowait())
+            except queue.Empty:
+                break
+        labels = self.registry.labels()
+        lines = [describe(event._replace(target=labels.get(event.target, event.target))) for event in events[-3:]]
+        if len(events) > 3:
+            lines.append(f"... and {len(events) - 3} more")
+        self.toast_shown += 1
+        shown = self.toast_shown
+        self.toast_label.config(text="\n".join(lines))
+        self.toast_label.place(relx=0.5, rely=1.0, y=-110, anchor="s")
+        self.root.after(TOAST_MS, lambda: self.hide_toast(shown))
+
+    def hide_toast(self, shown):
+        if shown == self.toast_shown:
+            self.toast_label.place_forget()
+
+    def show_burst_done(self):
+        """Report how long the last refresh burst took"""
+        self.bursts_seen = self.monitor.scheduler.bursts
+        probed, hurried, seconds = self.monitor.scheduler.last_burst
+        text = f"✅ Refreshed {probed} servers in {seconds * 1000:.0f}ms"
+        if hurried:
+            text += f" (+{hurried} started early)"
+        self.status_label.config(text=text, fg="#00ff88")
+        self.root.after(2000, lambda: self.status_label.config(text="🔴 Monitoring Active - Live Updates", fg="#00ff88"))
 
     def toggle_topmost(self):
         """Toggle always on top"""
@@ -506,9 +667,48 @@ class FloatingPingMonitor:
         # Reset status after 2 seconds
         self.root.after(2000, lambda: self.status_label.config(text="🔴 Monitoring Active - Live Updates", fg="#00ff88"))
 
+    def toggle_frame_stats(self):
+        """Show or hide render statistics (Tk callbacks, label updates, frame time)"""
+        self.show_frame_stats = not self.show_frame_stats
+        self.frame_stats.reset()
+        if not self.show_frame_stats:
+            self.status_label.config(text="🔴 Monitoring Active - Live Updates", fg="#00ff88")
+
+    def toggle_profiler(self):
+        """Start profiling with an overlay panel, or stop and save the profile"""
+        if profiler.toggle():
+            if self.profile_panel is None:
+                self.profile_panel = tk.Label(
+                    self.server_frame,
+                    font=("Courier New", 8),
+                    fg="#8888ff",  # Light blue
+                    bg='#111111',
+                    justify=tk.LEFT,
+                    anchor="nw",
+                    relief='ridge',
+                    bd=1
+                )
+            self.profile_panel.config(text="PROFILE starting...")
+            self.profile_panel.place(relx=0, rely=0, relwidth=1)  # Over the top of the list
+            return
+        self.profile_panel.place_forget()
+        path = profiler.dump(os.path.join(app_dir(), PROFILE_FILE))
+        if path is not None:
+            self.status_label.config(text=f"📊 Profile saved to {PROFILE_FILE}", fg="#8888ff")
+            self.root.after(2000, lambda: self.status_label.config(text="🔴 Monitoring Active - Live Updates", fg="#00ff88"))
+
     def quit(self):
         """Clean shutdown of the application"""
         self.running = False
+        if profiler.enabled:
+            profiler.dump(os.path.join(app_dir(), PROFILE_FILE))
+        self.monitor.stop()
+        self.storage.stop(timeout=2)  # Flush the last samples to disk
+        self.monitor.events.stream.stop(timeout=2)
+        if self.event_log is not None:
+            self.event_log.close()
+        if self.exporter is not None:
+            self.exporter.stop()
         self.root.quit()
         self.root.destroy()
 
@@ -516,10 +716,26 @@ class FloatingPingMonitor:
         """Start the application"""
         self.root.mainloop()
 
+def option_value(argv, name, convert=str):
+    """Value of a "--name VALUE" / "--name=VALUE" command line option, or None"""
+    for i, arg in enumerate(argv):
+        if arg == name and i + 1 < len(argv):
+            return convert(argv[i + 1])
+        if arg.startswith(name + "="):
+            return convert(arg.split("=", 1)[1])
+    return None
+
 def main():
     """Main entry point"""
+    if HEADLESS:
+        from ping_headless import main as headless_main
+        sys.exit(headless_main(sys.argv[1:]))
+    startup = StartupTimings()
+    startup.mark("imports")
     try:
-        app = FloatingPingMonitor()
+        app = FloatingPingMonitor(metrics_port=option_value(sys.argv[1:], "--metrics-port", int),
+                                  startup=startup, print_startup="--startup-timings" in sys.argv[1:],
+                                  webhook=option_value(sys.argv[1:], "--webhook"))
         app.run()
     except KeyboardInterrupt:
         print("\nPing monitor stopped by user")
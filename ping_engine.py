@@ -0,0 +1,563 @@
+"""
+Probe engine for the CS2 Ping Monitor
+
+Runs the probes for every target concurrently on a single asyncio event loop,
+so a full cycle costs roughly one timeout instead of the sum of all timeouts.
+In-flight probes are just futures on that loop - hundreds of targets need no
+extra threads or processes.
+
+- Configurable concurrency limit (how many probes may be in flight at once)
+- Per-target deadlines (a probe that overruns its deadline reports "error")
+- Fixed tick cadence: the engine ticks several times per base interval
+  (ping_schedule.TICKS_PER_INTERVAL), so adapted intervals can be shorter
+  than the base interval
+- No cycle barrier: each probe is a task of its own, so a dead target waiting
+  out its timeout never delays the other targets' next probes; a target whose
+  probe is still in flight is skipped until it lands
+- Probe starts spread by a fixed per-target phase within each target's own
+  interval, so they don't all burst at once and every target keeps its rate
+  (except in the first cycle, so every row fills in as soon as it can)
+- New hostnames are resolved in the background; only their own probes wait
+  for the answer, targets given as IPs are probed straight away
+- Per-target intervals, adapted to each target's results: volatile targets
+  more often, stable ones less, failing ones with exponential backoff, all
+  within a global probe budget (see ping_schedule.py)
+- Targets that hit the same endpoint (same method and resolved address) share
+  one probe; its result is reported for each of them
+- The target list can be swapped while running (hot reload, see ping_targets.py)
+- On-demand bursts (refresh): the requested targets' probes still waiting
+  out their jitter start at once, every other requested target is probed
+  right away, and the burst lasts until all of them have landed
+- Pluggable probe backends (see ping_probers.py)
+- Optional burst mode: N closely spaced probes per target each cycle, all
+  targets' bursts interleaved, for per-cycle loss, spread and reordering
+- MonitorCore: headless core on its own thread. Results go to a latest-state
+  table (coalesced, for renderers), optionally a thread-safe queue (every
+  result, for streaming consumers), a bounded per-target latency history
+  (see ping_history.py), the best-region recommender (see ping_recommend.py),
+  the exporter counters (see ping_exporter.py), the change-event detector
+  (down/up, RTT and loss alerts - see ping_events.py) and optionally on-disk
+  storage (see ping_storage.py)
+"""
+
+import asyncio
+import queue
+import random
+import threading
+import time
+from collections import namedtuple
+
+from ping_events import ChangeDetector
+from ping_exporter import MetricsCollector
+from ping_history import DEFAULT_WINDOW, HistoryStore
+from ping_probers import MultiProber, summarize_burst
+from ping_profiler import profiler
+from ping_recommend import Recommender
+from ping_resolver import ResolverCache
+from ping_schedule import DEFAULT_PROBE_RATE, TICKS_PER_INTERVAL, AdaptivePolicy
+
+# Result of one probe: value is the RTT in ms (float), "timeout" or "error";
+# method names the backend that produced it (icmp-dgram, tcp-443, a2s-27015, ...);
+# address is the IP probed and resolve_ms the DNS time, reported apart from the RTT;
+# burst is the summarize_burst() dict in burst mode (value is then the median RTT)
+ProbeResult = namedtuple("ProbeResult", ["target", "value", "started", "duration", "method",
+                                         "address", "resolve_ms", "burst"], defaults=(None,))
+
+DEFAULT_INTERVAL = 1.0     # seconds between probes of a target (base interval)
+DEFAULT_TIMEOUT = 3.0      # seconds the ping itself waits for a reply
+DEFAULT_CONCURRENCY = 256  # probes allowed in flight at the same time
+DEADLINE_GRACE = 1.0       # extra seconds before a probe is abandoned
+DEFAULT_BURST_SPACING = 0.02  # seconds between the probes of a burst
+
+
+class ProbeScheduler:
+    """Probe a list of targets concurrently on a fixed tick cadence
+
+    Every probe is a task of its own, so a tick never waits for the previous
+    tick's probes; a target still waiting or in flight is not started again.
+    """
+
+    def __init__(self, targets, prober=None, interval=DEFAULT_INTERVAL,
+                 timeout=DEFAULT_TIMEOUT, concurrency=DEFAULT_CONCURRENCY,
+                 deadlines=None, jitter=0.0, on_result=None, intervals=None,
+                 priority=None, probe_rate=DEFAULT_PROBE_RATE, adaptive=True,
+                 burst_count=1, burst_spacing=DEFAULT_BURST_SPACING, tick=None):
+        self.targets = list(targets)
+        self.prober = prober  # None = MultiProber (per-target method), opened on the loop
+        self.interval = interval  # base interval of targets without their own
+        self.tick = tick if tick is not None else interval / TICKS_PER_INTERVAL
+        self.timeout = timeout
+        self.concurrency = concurrency
+        self.deadlines = dict(deadlines or {})  # target -> seconds, overrides the default
+        self.jitter = jitter  # fraction of each target's interval probe starts are spread over
+        self.burst_count = burst_count  # probes per target per cycle (1 = single probe)
+        self.burst_spacing = burst_spacing
+        self.on_result = on_result
+        self.loop = None
+        self.running = True
+        self.cycles = 0
+        self.probes = 0  # probes actually sent (targets sharing an endpoint count once)
+        self.last_cycle_time = 0.0
+        self.last_lag = 0.0      # seconds the latest tick started after it was due
+        self.missed_ticks = 0    # ticks skipped because a cycle overran the interval
+        # Which targets are due each tick (intervals, backoff, probe budget)
+        self.policy = AdaptivePolicy(interval, intervals, priority, probe_rate, adaptive,
+                                     cost=burst_count, tick=self.tick)
+        self._stop_event = None
+        self._semaphore = None
+        self._prober_open = False
+        self._prepared = set()
+        self._preparing = {}    # target -> task resolving it, until its first probe
+        self._waiters = {}      # target -> future of its jitter delay, while it waits
+        self._inflight = {}     # target -> task probing it (waiting out jitter or in flight)
+        self._phases = {}       # target -> fixed fraction of its jitter spread it starts at
+        self._cycle_tasks = set()
+        self._burst_semaphore = None
+        self._burst_tasks = set()
+        self.bursts = 0
+        self.last_burst = None  # (targets probed, targets hurried, seconds) of the latest burst
+
+    def deadline_for(self, target):
+        """Seconds a probe for this target may take before it is abandoned"""
+        deadline = self.deadlines.get(target, self.timeout + DEADLINE_GRACE)
+        return deadline + (self.burst_count - 1) * self.burst_spacing
+
+    async def _probe(self, target):
+        """One probe, or one burst in burst mode: (value, burst summary or None)"""
+        if self.burst_count <= 1:
+            return await self.prober.probe(target, self.timeout), None
+        rtts, order = await self.prober.burst(target, self.burst_count, self.burst_spacing, self.timeout)
+        burst = summarize_burst(rtts, order)
+        return (burst["median"] if burst["received"] else "error"), burst
+
+    def set_targets(self, targets, intervals=None, priority=None):
+        """Replace the target list (safe to call from any thread; applies from the next cycle)"""
+        targets = list(targets)
+        self.policy.configure(targets, intervals, priority)
+        keep = set(targets)
+        self._phases = {t: phase for t, phase in self._phases.items() if t in keep}
+        self.targets = targets
+
+    async def _delay(self, delay, targets):
+        """Sleep that a burst can cut short for these targets (see hurry())"""
+        loop = asyncio.get_running_loop()
+        waiter = loop.create_future()
+        handle = loop.call_later(delay, _wake, waiter)
+        for target in targets:
+            self._waiters[target] = waiter
+        try:
+            await waiter
+        finally:
+            handle.cancel()
+            for target in targets:
+                if self._waiters.get(target) is waiter:
+                    del self._waiters[target]
+
+    def hurry(self, targets=None):
+        """Start the probes of targets (default: all) still waiting out their jitter now; returns how many"""
+        waiters = self._waiters.values() if targets is None else \
+            [self._waiters[t] for t in targets if t in self._waiters]
+        hurried = 0
+        for waiter in set(waiters):
+            if not waiter.done():
+                waiter.set_result(None)
+                hurried += 1
+        return hurried
+
+    async def probe_group(self, targets, delay=0.0, semaphore=None):
+        """Probe one endpoint under the concurrency limit and report it for every target sharing it"""
+        preparing = {self._preparing.pop(t) for t in targets if t in self._preparing}
+        if preparing:
+            await asyncio.wait(preparing)  # wait() leaves the shared task alone if we're cancelled
+        if delay > 0:
+            await self._delay(delay, targets)
+        return await self._probe_group(targets, semaphore or self._semaphore)
+
+    def start_group(self, targets, delay=0.0, semaphore=None):
+        """Start probe_group() as a task of its own; its targets count as in flight until it ends"""
+        task = asyncio.ensure_future(self.probe_group(targets, delay, semaphore))
+        for target in targets:
+            self._inflight[target] = task
+        task.add_done_callback(lambda task: self._landed(targets, task))
+        return task
+
+    def _landed(self, targets, task):
+        for target in targets:
+            if self._inflight.get(target) is task:
+                del self._inflight[target]
+
+    async def _probe_group(self, targets, semaphore):
+        target = targets[0]
+        burst = None
+        waited = time.perf_counter() if profiler.enabled else None
+        async with semaphore:
+            started = time.monotonic()
+            if waited is not None:
+                profiler.stage("slot_wait", time.perf_counter() - waited)
+            try:
+                value, burst = await asyncio.wait_for(self._probe(target),
+                                                      min(self.deadline_for(t) for t in targets))
+            except asyncio.TimeoutError:
+                value = "error"
+            except Exception as e:
+                print(f"Error pinging {target}: {e}")
+                value = "error"
+            duration = time.monotonic() - started
+            self.probes += self.burst_count
+
+        timed = profiler.enabled
+        if timed:
+            profiler.stage("probe", duration)
+        results = []
+        finished = time.monotonic()
+        for target in targets:
+            self.policy.observe(target, value, finished)
+            address, resolve_ms = self.prober.address_for(target)
+            result = ProbeResult(target, value, started, duration,
+                                 self.prober.method_for(target), address, resolve_ms, burst)
+            if self.on_result is not None:
+                dispatched = time.perf_counter() if timed else None
+                self.on_result(result)
+                if dispatched is not None:
+                    profiler.stage("dispatch", time.perf_counter() - dispatched)
+            results.append(result)
+        return results
+
+    async def probe_target(self, target, delay=0.0):
+        """Run a single probe under the concurrency limit and its deadline"""
+        return (await self.start_group([target], delay))[0]
+
+    def group_by_endpoint(self, targets):
+        """Group targets that would probe the same endpoint (same method and address)"""
+        groups = {}
+        for target in targets:
+            groups.setdefault(self.prober.endpoint_for(target), []).append(target)
+        return list(groups.values())
+
+    def _prepare(self, targets):
+        """Open the prober on first use and start resolving targets not seen before"""
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+        if not self._prober_open:
+            if self.prober is None:
+                self.prober = MultiProber()
+            self.prober.open()
+            self._prober_open = True
+        new = [t for t in targets if t not in self._prepared]
+        if new:
+            # Resolve new hostnames in the background so no DNS lands in their first
+            # RTTs; only their own probes wait for it (see probe_group)
+            task = asyncio.ensure_future(self.prober.prepare(new))
+            for target in new:
+                self._preparing[target] = task
+            self._prepared.update(new)
+
+    def phase_delay(self, targets):
+        """Start delay of an endpoint group: a fixed phase within jitter x its own interval
+
+        The phase is drawn once per target, so its probes stay one interval
+        apart instead of wandering by up to the whole spread from cycle to cycle.
+        """
+        if self.jitter <= 0:
+            return 0.0
+        phase = self._phases.get(targets[0])
+        if phase is None:
+            phase = self._phases[targets[0]] = random.random()
+        return phase * self.jitter * min(self.policy.interval_for(t) for t in targets)
+
+    def start_cycle(self, targets):
+        """Start one task per endpoint among targets now, at their phase; returns the tasks"""
+        self._prepare(targets)
+        first = not self.cycles  # First results as soon as possible
+        return [self.start_group(group, 0.0 if first else self.phase_delay(group))
+                for group in self.group_by_endpoint(targets)]
+
+    async def run_cycle(self, targets=None):
+        """Probe every target (or the given ones) once in parallel and return the results"""
+        if targets is None:
+            targets = self.targets
+        started = time.monotonic()
+        groups = await asyncio.gather(*self.start_cycle(targets))
+        self.last_cycle_time = time.monotonic() - started
+        self.cycles += 1
+        if profiler.enabled:
+            profiler.stage("cycle", self.last_cycle_time)
+            profiler.gauge("cycle_load", 100.0 * self.last_cycle_time / self.interval)
+        return [result for group in groups for result in group]
+
+    async def burst(self, targets=None):
+        """Probe targets (default: all) immediately, ahead of the regular cycle
+
+        Probes of these targets still waiting out their jitter start now and
+        are awaited along with any already in flight; the rest are probed at
+        once under their own concurrency limit, so they don't queue behind the
+        cycle. last_burst counts and times every requested target. Returns the
+        results.
+        """
+        started = time.monotonic()
+        if targets is None:
+            targets = self.targets
+        else:
+            known = set(self.targets)
+            targets = [t for t in targets if t in known]
+        self._prepare(targets)
+        if self._burst_semaphore is None:
+            self._burst_semaphore = asyncio.Semaphore(self.concurrency)
+        hurried = self.hurry(targets)
+        # Targets already waiting or in flight are not probed twice - their probe is awaited
+        running = {self._inflight[t] for t in targets if t in self._inflight}
+        fresh = [t for t in targets if t not in self._inflight]
+        self.policy.reschedule(fresh, started)
+        tasks = [self.start_group(group, semaphore=self._burst_semaphore)
+                 for group in self.group_by_endpoint(fresh)]
+        tasks.extend(running)
+        if tasks:
+            await asyncio.wait(tasks)  # wait() leaves tasks shared with the cycle alone if we're cancelled
+        self.bursts += 1
+        self.last_burst = (len(targets), hurried, time.monotonic() - started)
+        wanted = set(targets)
+        return [result for task in tasks if not task.cancelled() and task.exception() is None
+                for result in task.result() if result.target in wanted]
+
+    def request_burst(self, targets=None):
+        """Ask the running engine for a burst (safe to call from any thread)"""
+        loop = self.loop
+        if loop is None or loop.is_closed() or not self.running:
+            return False
+        targets = list(targets) if targets is not None else None
+        try:
+            loop.call_soon_threadsafe(self._start_burst, targets)
+        except RuntimeError:
+            return False  # Loop already closed
+        return True
+
+    def _start_burst(self, targets):
+        task = self.loop.create_task(self.burst(targets))
+        self._burst_tasks.add(task)
+        task.add_done_callback(self._burst_tasks.discard)
+
+    async def run_forever(self):
+        """Run cycles on a fixed cadence until stop() is called"""
+        self._stop_event = asyncio.Event()
+        self._semaphore = asyncio.Semaphore(self.concurrency)
+        next_start = time.monotonic()
+        cpu = sent = None
+        while self.running:
+            now = time.monotonic()
+            self.last_lag = max(0.0, now - next_start)  # how late this tick started
+            # Each due probe is a task of its own: a slow or dead target never holds up
+            # the next tick, and a target still in flight is skipped until it lands
+            due = self.policy.due([t for t in self.targets if t not in self._inflight], now)
+            if due:
+                task = asyncio.ensure_future(self.run_cycle(due))
+                self._cycle_tasks.add(task)
+                task.add_done_callback(self._cycle_tasks.discard)
+            if profiler.enabled:
+                profiler.gauge("lag_ms", self.last_lag * 1000.0)
+                profiler.gauge("due", len(due))
+                if cpu is not None and self.probes > sent:
+                    # Engine thread CPU per probe sent since the last tick (bursts included)
+                    profiler.stage("cpu_per_probe", (time.thread_time() - cpu) / (self.probes - sent))
+                cpu, sent = time.thread_time(), self.probes
+            else:
+                cpu = None
+
+            # Align to the next tick; skip ticks missed because the loop was held up
+            now = time.monotonic()
+            next_start += self.tick
+            if next_start < now:
+                missed = (now - next_start) // self.tick + 1
+                self.missed_ticks += int(missed)
+                next_start += missed * self.tick
+            try:
+                await asyncio.wait_for(self._stop_event.wait(), next_start - now)
+            except asyncio.TimeoutError:
+                pass
+
+    def run(self):
+        """Run the scheduler on a private event loop (blocks the calling thread)"""
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        try:
+            self.loop.run_until_complete(self.run_forever())
+            if self._cycle_tasks or self._burst_tasks:
+                # Let probes and a refresh started just before stop() finish (bounded by their deadlines)
+                self.loop.run_until_complete(asyncio.gather(*self._cycle_tasks, *self._burst_tasks,
+                                                            return_exceptions=True))
+        finally:
+            if self._prober_open:
+                self.prober.close()
+            self.loop.close()
+
+    def stop(self):
+        """Stop ticking; probes in flight still land (safe to call from any thread)"""
+        self.running = False
+        loop = self.loop
+        if loop is not None and self._stop_event is not None and not loop.is_closed():
+            try:
+                loop.call_soon_threadsafe(self._stop_event.set)
+            except RuntimeError:
+                pass  # Loop already closed
+
+
+def _wake(waiter):
+    if not waiter.done():
+        waiter.set_result(None)
+
+
+class LatestState:
+    """Latest result per target plus the targets changed since the last take
+
+    The engine writes every result; a renderer calls take_changes() once per
+    frame and gets only the targets that changed, each with its newest result,
+    however many probes landed in between.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latest = {}
+        self.dirty = set()
+
+    def update(self, result):
+        with self.lock:
+            self.latest[result.target] = result
+            self.dirty.add(result.target)
+
+    def take_changes(self):
+        """Return {target: newest result} for targets updated since the last call"""
+        with self.lock:
+            if not self.dirty:
+                return {}
+            changes = {target: self.latest[target] for target in self.dirty}
+            self.dirty.clear()
+        return changes
+
+    def snapshot(self):
+        """Copy of the latest result for every target"""
+        with self.lock:
+            return dict(self.latest)
+
+    def discard(self, target):
+        with self.lock:
+            self.latest.pop(target, None)
+            self.dirty.discard(target)
+
+
+class MonitorCore:
+    """Headless monitoring core: one event loop thread, results on a thread-safe queue
+
+    Nothing here touches tkinter - the UI reads the latest-state table on its
+    own frame tick; other consumers drain the results queue from their thread.
+    """
+
+    def __init__(self, targets, prober=None, interval=DEFAULT_INTERVAL,
+                 timeout=DEFAULT_TIMEOUT, concurrency=DEFAULT_CONCURRENCY,
+                 deadlines=None, jitter=0.5, pins=None, dns_ttl=None,
+                 history_window=DEFAULT_WINDOW, queue_results=True, storage=None,
+                 intervals=None, priority=None, probe_rate=DEFAULT_PROBE_RATE, adaptive=True,
+                 regions=None, burst_count=1, burst_spacing=DEFAULT_BURST_SPACING, alerts=None):
+        # Every result, in order - leave off when nobody drains it
+        self.results = queue.Queue() if queue_results else None
+        self.latest = LatestState()
+        self.storage = storage  # StorageWriter - record() only queues, never touches disk
+        self.history = HistoryStore(history_window)
+        self.recommender = Recommender(regions)  # target -> region; ranks the regions
+        self.metrics = MetricsCollector()  # counters for the /metrics endpoint
+        self.events = ChangeDetector(alerts)  # AlertThresholds; subscribe via events.stream
+        # hostname -> address to always probe, e.g. {"google.com": "142.250.74.46"}
+        self.resolver = ResolverCache() if dns_ttl is None else ResolverCache(ttl=dns_ttl)
+        self.pins = {}
+        self.set_pins(pins)
+        self._current = frozenset(targets)  # swapped whole, so the engine thread reads it lock-free
+        if prober is None:
+            prober = MultiProber(resolver=self.resolver)
+        self.scheduler = ProbeScheduler(
+            targets,
+            prober=prober,
+            interval=interval,
+            timeout=timeout,
+            concurrency=concurrency,
+            deadlines=deadlines,
+            jitter=jitter,
+            on_result=self._on_result,
+            intervals=intervals,
+            priority=priority,
+            probe_rate=probe_rate,
+            adaptive=adaptive,
+            burst_count=burst_count,
+            burst_spacing=burst_spacing
+        )
+        self.thread = None
+
+    def _on_result(self, result):
+        """Record a result in the history and hand it to consumers (engine thread)"""
+        if result.target not in self._current:
+            return  # Probe was in flight when its target was removed - don't bring it back
+        timestamp = time.time()
+        self.history.record(result, timestamp)
+        self.recommender.record(result, timestamp)
+        self.metrics.record(result)
+        self.events.observe(result, timestamp)
+        self.latest.update(result)
+        if self.storage is not None:
+            self.storage.record(result, timestamp, self.scheduler.burst_spacing)
+        if self.results is not None:
+            self.results.put(result)
+
+    def set_pins(self, pins):
+        """Replace the pinned hostname -> address map (see ResolverCache.pin)"""
+        pins = dict(pins or {})
+        for host in set(self.pins) - set(pins):
+            self.resolver.unpin(host)
+        for host, address in pins.items():
+            if self.pins.get(host) != address:
+                self.resolver.pin(host, address)
+        self.pins = pins
+
+    def set_targets(self, targets, intervals=None, priority=None, regions=None, alerts=None, pins=None):
+        """Swap the target list while running; removed targets lose their history"""
+        removed = set(self.scheduler.targets) - set(targets)
+        self._current = frozenset(targets)
+        self.set_pins(pins)
+        self.scheduler.set_targets(targets, intervals, priority)
+        self.recommender.set_regions(regions)
+        self.events.configure(alerts)
+        for target in removed:
+            self.history.discard(target)
+            self.latest.discard(target)
+            self.metrics.discard(target)
+            self.events.discard(target)
+
+    def refresh(self, targets=None):
+        """Probe targets (default: all) right now instead of waiting for their turn
+
+        The burst's size and duration end up in scheduler.last_burst.
+        """
+        return self.scheduler.request_burst(targets)
+
+    def schedule(self):
+        """{target: scheduling decision} - interval, reason, next probe, failures, ..."""
+        return self.scheduler.policy.decisions(time.monotonic())
+
+    def start(self):
+        """Start probing on a daemon thread"""
+        self.thread = threading.Thread(target=self.scheduler.run, name="probe-engine", daemon=True)
+        self.thread.start()
+
+    def stop(self, timeout=None):
+        """Stop the engine; optionally wait up to timeout seconds for the thread"""
+        self.scheduler.stop()
+        if timeout is not None and self.thread is not None:
+            self.thread.join(timeout)
+
+    def drain(self, limit=None):
+        """Return the queued results without blocking (at most limit of them)"""
+        drained = []
+        if self.results is None:
+            return drained
+        while limit is None or len(drained) < limit:
+            try:
+                drained.append(self.results.get_nowait())
+            except queue.Empty:
+                break
+        return drained
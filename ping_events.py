@@ -0,0 +1,284 @@
+"""
+Change events and alerts for the CS2 Ping Monitor
+
+Turns the stream of probe results into events that only fire on meaningful
+transitions, so consumers can react to a server going down or a route
+getting slower without re-reading every target's state each cycle:
+
+    down           DOWN_AFTER probes in a row failed after the target answered
+    up             the first reply after "down"
+    rtt_high       CONFIRM replies in a row above the target's RTT threshold
+    rtt_normal     CONFIRM replies in a row below threshold - hysteresis
+    loss_spike     loss over the last LOSS_WINDOW probes reached loss_pct
+    loss_normal    ...and dropped back below loss_pct - hysteresis
+    address        the probed address changed (DNS answer, i.e. a new route)
+
+Every result updates a small per-target state machine in O(1) on the engine
+thread (ChangeDetector.observe); nothing is diffed or scanned per cycle.
+Events go to an EventStream, which hands them to subscribers on its own
+thread, so a slow log file or webhook never holds up the probes:
+
+    stream.subscribe(callback)     any callable, called with each Event
+    EventLog(path)                 appends JSON lines
+    Webhook(url)                   POSTs each event as JSON (e.g. a local endpoint)
+
+Thresholds come from servers.json - a top-level "alerts" object and an
+optional "alert_rtt_ms" per target (see ping_targets.py):
+
+{"alerts": {"rtt_ms": 80, "rtt_hysteresis_ms": 10, "loss_pct": 5}, "categories": [...]}
+"""
+
+import json
+import queue
+import threading
+from collections import deque, namedtuple
+
+from ping_history import samples_of
+
+# kind: see above; value: the RTT, loss % or address that triggered it;
+# previous: what it was before (RTT threshold for rtt_*, old address, ...)
+Event = namedtuple("Event", ["kind", "target", "timestamp", "value", "previous", "method"])
+
+DEFAULT_RTT_MS = 150.0           # rtt_high above this...
+DEFAULT_RTT_HYSTERESIS_MS = 15.0  # ...rtt_normal below threshold - this
+DEFAULT_LOSS_PCT = 10.0          # loss_spike at this loss over the window...
+DEFAULT_LOSS_HYSTERESIS_PCT = 5.0  # ...loss_normal below loss_pct - this
+DOWN_AFTER = 2                   # failed probes in a row before "down"
+CONFIRM = 3                      # replies in a row needed to cross an RTT threshold
+LOSS_WINDOW = 20                 # probes the loss is computed over
+
+
+class AlertThresholds:
+    """When events fire: RTT and loss thresholds, per-target RTT overrides"""
+
+    def __init__(self, rtt_ms=DEFAULT_RTT_MS, rtt_hysteresis_ms=DEFAULT_RTT_HYSTERESIS_MS,
+                 loss_pct=DEFAULT_LOSS_PCT, loss_hysteresis_pct=DEFAULT_LOSS_HYSTERESIS_PCT,
+                 down_after=DOWN_AFTER, per_target=None):
+        self.rtt_ms = rtt_ms
+        self.rtt_hysteresis_ms = rtt_hysteresis_ms
+        self.loss_pct = loss_pct
+        self.loss_hysteresis_pct = loss_hysteresis_pct
+        self.down_after = down_after
+        self.per_target = dict(per_target or {})  # target -> RTT threshold in ms
+
+    @classmethod
+    def from_config(cls, settings, per_target=None):
+        """Build from servers.json's "alerts" object (missing keys keep their defaults)"""
+        settings = settings or {}
+        return cls(
+            float(settings.get("rtt_ms", DEFAULT_RTT_MS)),
+            float(settings.get("rtt_hysteresis_ms", DEFAULT_RTT_HYSTERESIS_MS)),
+            float(settings.get("loss_pct", DEFAULT_LOSS_PCT)),
+            float(settings.get("loss_hysteresis_pct", DEFAULT_LOSS_HYSTERESIS_PCT)),
+            int(settings.get("down_after", DOWN_AFTER)),
+            per_target,
+        )
+
+    def rtt_for(self, target):
+        return self.per_target.get(target, self.rtt_ms)
+
+
+class TargetAlertState:
+    """Where one target stands in each state machine"""
+
+    __slots__ = ("up", "failures", "high", "streak", "window", "lost", "spike", "address")
+
+    def __init__(self):
+        self.up = None       # None until the first probe
+        self.failures = 0
+        self.high = False    # RTT above threshold
+        self.streak = 0      # replies in a row on the other side of the RTT threshold
+        self.window = deque(maxlen=LOSS_WINDOW)  # True for each lost probe, from the first reply
+        self.lost = 0
+        self.spike = False
+        self.address = None
+
+
+class ChangeDetector:
+    """Per-target state machines fed one result at a time (engine thread)"""
+
+    def __init__(self, thresholds=None, stream=None):
+        self.thresholds = thresholds or AlertThresholds()
+        self.stream = stream if stream is not None else EventStream()
+        self.states = {}
+        self.events = 0
+
+    def configure(self, thresholds):
+        """Apply new thresholds (hot reload); states are kept"""
+        self.thresholds = thresholds or AlertThresholds()
+
+    def discard(self, target):
+        self.states.pop(target, None)
+
+    def observe(self, result, timestamp):
+        """Update the target's state from a ProbeResult and publish any transitions"""
+        state = self.states.get(result.target)
+        if state is None:
+            state = self.states[result.target] = TargetAlertState()
+        events = []
+
+        def emit(kind, value, previous=None):
+            events.append(Event(kind, result.target, timestamp, value, previous, result.method))
+
+        if result.address is not None:
+            if state.address is not None and result.address != state.address:
+                emit("address", result.address, state.address)
+            state.address = result.address
+
+        # Loss over the last LOSS_WINDOW probes (every probe of a burst counts),
+        # from the first reply on - a target that never answered has no loss spike,
+        # just as it is down without an event
+        thresholds = self.thresholds
+        samples = samples_of(result)
+        if state.window or any(rtt is not None for rtt in samples):
+            for rtt in samples:
+                if len(state.window) == state.window.maxlen:
+                    state.lost -= state.window[0]
+                state.window.append(rtt is None)
+                state.lost += rtt is None
+        if len(state.window) >= LOSS_WINDOW // 2:
+            loss = 100.0 * state.lost / len(state.window)
+            if not state.spike and loss >= thresholds.loss_pct:
+                state.spike = True
+                emit("loss_spike", loss, thresholds.loss_pct)
+            elif state.spike and loss < thresholds.loss_pct - thresholds.loss_hysteresis_pct:
+                state.spike = False
+                emit("loss_normal", loss, thresholds.loss_pct)
+
+        value = result.value
+        if isinstance(value, float):
+            if state.up is False:
+                emit("up", value)
+            state.up = True
+            state.failures = 0
+            threshold = thresholds.rtt_for(result.target)
+            crossing = value < threshold - thresholds.rtt_hysteresis_ms if state.high else value > threshold
+            state.streak = state.streak + 1 if crossing else 0
+            if state.streak >= CONFIRM:
+                state.high = not state.high
+                state.streak = 0
+                emit("rtt_high" if state.high else "rtt_normal", value, threshold)
+        else:
+            state.failures += 1
+            state.streak = 0
+            if state.up is not False and state.failures >= thresholds.down_after:
+                if state.up:
+                    emit("down", value)
+                state.up = False  # A target that never answered is down without an event
+
+        if events:
+            self.events += len(events)
+            self.stream.publish(events)
+        return events
+
+
+class EventStream:
+    """Delivers events to subscribers on a thread of its own (started by the first subscriber)"""
+
+    def __init__(self):
+        self.subscribers = []
+        self.queue = None
+        self.thread = None
+        self.lock = threading.Lock()
+
+    def subscribe(self, callback):
+        """Call callback(event) for every event from now on (on the stream's thread)"""
+        with self.lock:
+            self.subscribers = self.subscribers + [callback]
+            if self.thread is None:
+                self.queue = queue.Queue()
+                self.thread = threading.Thread(target=self._run, name="events", daemon=True)
+                self.thread.start()
+        return callback
+
+    def unsubscribe(self, callback):
+        with self.lock:
+            self.subscribers = [s for s in self.subscribers if s is not callback]
+
+    def publish(self, events):
+        """Queue events for the subscribers (never blocks; dropped if nobody listens)"""
+        if self.queue is not None:
+            self.queue.put(events)
+
+    def _run(self):
+        while True:
+            events = self.queue.get()
+            if events is None:
+                return
+            for event in events:
+                for callback in self.subscribers:
+                    try:
+                        callback(event)
+                    except Exception as e:
+                        print(f"Error delivering {event.kind} event for {event.target}: {e}")
+
+    def stop(self, timeout=None):
+        """Deliver what is queued, then stop the thread"""
+        if self.thread is not None:
+            self.queue.put(None)
+            self.thread.join(timeout)
+
+
+def event_dict(event):
+    """An Event as a JSON-friendly dict"""
+    row = event._asdict()
+    row["timestamp"] = round(event.timestamp, 3)
+    for key in ("value", "previous"):
+        if isinstance(row[key], float):
+            row[key] = round(row[key], 3)
+    return row
+
+
+def describe(event):
+    """Short human-readable text, e.g. for a toast"""
+    target = event.target
+    if event.kind == "down":
+        return f"🔴 {target} is down ({event.value})"
+    if event.kind == "up":
+        return f"🟢 {target} is back ({event.value:.0f}ms)"
+    if event.kind == "rtt_high":
+        return f"🟠 {target} ping {event.value:.0f}ms (over {event.previous:.0f}ms)"
+    if event.kind == "rtt_normal":
+        return f"🟢 {target} ping back to {event.value:.0f}ms"
+    if event.kind == "loss_spike":
+        return f"🟠 {target} losing {event.value:.0f}% of probes"
+    if event.kind == "loss_normal":
+        return f"🟢 {target} loss back to {event.value:.0f}%"
+    if event.kind == "address":
+        return f"🔀 {target} now at {event.value} (was {event.previous})"
+    return f"{event.kind} {target}"
+
+
+class EventLog:
+    """Subscriber appending every event to a file as a JSON line"""
+
+    def __init__(self, path):
+        self.path = path
+        self.file = open(path, "a", encoding="utf-8")
+
+    def __call__(self, event):
+        self.file.write(json.dumps(event_dict(event), ensure_ascii=False) + "\n")
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+
+class Webhook:
+    """Subscriber POSTing every event as JSON to a URL (urllib is only imported when used)"""
+
+    def __init__(self, url, timeout=2.0):
+        self.url = url
+        self.timeout = timeout
+        self.errors = 0
+
+    def __call__(self, event):
+        import urllib.request
+        body = json.dumps(event_dict(event), ensure_ascii=False).encode("utf-8")
+        request = urllib.request.Request(self.url, data=body, headers={"Content-Type": "application/json"})
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                response.read()
+        except OSError as e:
+            self.errors += 1
+            print(f"Error posting event to {self.url}: {e}")
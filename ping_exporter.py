@@ -0,0 +1,223 @@
+"""
+Prometheus / OpenMetrics exporter for the CS2 Ping Monitor
+
+Serves GET /metrics over plain HTTP (stdlib http.server on a daemon thread)
+from the window or headless mode, e.g. --metrics-port 9464:
+
+    cs2ping_rtt_seconds                histogram  {target, method}  reply RTTs
+    cs2ping_probes_total               counter    {target, method}  probes sent
+    cs2ping_probes_lost_total          counter    {target, method}  probes without a reply
+    cs2ping_up                         gauge      {target, method}  1 if the last probe answered
+    cs2ping_probe_duration_seconds     histogram  {method}          wall time of a probe or burst
+    cs2ping_scheduler_lag_seconds      gauge      how late the latest engine tick started
+    cs2ping_scheduler_missed_ticks_total counter  ticks skipped by a late event loop
+    cs2ping_cycle_duration_seconds     gauge      wall time of the latest tick's probes
+    cs2ping_cycles_total               counter    cycles run
+
+The OpenMetrics format is served when the scraper asks for it (Accept:
+application/openmetrics-text), the classic Prometheus text format otherwise.
+
+Scrapes never block the engine or the UI: only the engine thread writes the
+counters, and a scrape works from copies taken without any lock (dict and
+array copies are single operations under the GIL). A scrape can see one
+probe counted in one metric and not yet in the next - harmless for counters
+that only grow.
+"""
+
+import bisect
+import threading
+from array import array
+
+from ping_history import samples_of
+
+# Histogram bucket upper bounds in seconds (+Inf is implied)
+RTT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.02, 0.03, 0.05, 0.075, 0.1, 0.15, 0.25, 0.5, 1.0, 2.5)
+DURATION_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+DEFAULT_HOST = "127.0.0.1"
+OPENMETRICS_TYPE = "application/openmetrics-text; version=1.0.0; charset=utf-8"
+PROMETHEUS_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class Histogram:
+    """Bucket counts: buckets[i] counts observations in (bounds[i-1], bounds[i]], the last one is +Inf"""
+
+    __slots__ = ("bounds", "buckets", "sum")
+
+    def __init__(self, bounds):
+        self.bounds = bounds
+        self.buckets = array("Q", bytes(8 * (len(bounds) + 1)))
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.buckets[bisect.bisect_left(self.bounds, value)] += 1
+        self.sum += value
+
+    def copy(self):
+        """(cumulative bucket counts, sum, count)"""
+        counts = self.buckets[:]
+        total = 0
+        cumulative = []
+        for count in counts:
+            total += count
+            cumulative.append(total)
+        return cumulative, self.sum, total
+
+
+class TargetMetrics:
+    """Counters for one target (written by the engine thread only)"""
+
+    __slots__ = ("method", "rtt", "probes", "lost", "up")
+
+    def __init__(self, method):
+        self.method = method
+        self.rtt = Histogram(RTT_BUCKETS)
+        self.probes = 0
+        self.lost = 0
+        self.up = 0
+
+
+class MetricsCollector:
+    """Per-target RTT histograms and loss counters, fed by MonitorCore"""
+
+    def __init__(self):
+        self.targets = {}    # target -> TargetMetrics
+        self.durations = {}  # method -> Histogram of probe durations
+
+    def record(self, result):
+        """Count a ProbeResult (engine thread)"""
+        metrics = self.targets.get(result.target)
+        if metrics is None or metrics.method != result.method:
+            metrics = TargetMetrics(result.method)
+            self.targets[result.target] = metrics  # A method change starts a new series
+        for rtt in samples_of(result):
+            metrics.probes += 1
+            if rtt is None:
+                metrics.lost += 1
+            else:
+                metrics.rtt.observe(rtt / 1000.0)
+        metrics.up = 1 if isinstance(result.value, float) else 0
+        duration = self.durations.get(result.method)
+        if duration is None:
+            duration = self.durations[result.method] = Histogram(DURATION_BUCKETS)
+        duration.observe(result.duration)
+
+    def discard(self, target):
+        self.targets.pop(target, None)
+
+
+def escape(value):
+    return str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+def format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def render(collector, scheduler=None, openmetrics=True):
+    """The exposition text for a scrape (works on lock-free copies)"""
+    lines = []
+    targets = sorted(collector.targets.copy().items())
+    durations = sorted(collector.durations.copy().items())
+
+    def family(name, kind, help_text):
+        # OpenMetrics names counter families without the _total suffix
+        if kind == "counter" and openmetrics and name.endswith("_total"):
+            name = name[:-len("_total")]
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+
+    def histogram(name, labels, snapshot, bounds):
+        cumulative, total, count = snapshot
+        for bound, value in zip(bounds + (float("inf"),), cumulative):
+            lines.append(f'{name}_bucket{{{labels},le="{format_value(float(bound))}"}} {value}')
+        lines.append(f"{name}_sum{{{labels}}} {format_value(float(total))}")
+        lines.append(f"{name}_count{{{labels}}} {count}")
+
+    labelled = [(f'target="{escape(target)}",method="{escape(metrics.method)}"', metrics)
+                for target, metrics in targets]
+
+    family("cs2ping_rtt_seconds", "histogram", "Round-trip time of answered probes")
+    for labels, metrics in labelled:
+        histogram("cs2ping_rtt_seconds", labels, metrics.rtt.copy(), RTT_BUCKETS)
+
+    family("cs2ping_probes_total", "counter", "Probes sent (every probe of a burst counts)")
+    for labels, metrics in labelled:
+        lines.append(f"cs2ping_probes_total{{{labels}}} {metrics.probes}")
+
+    family("cs2ping_probes_lost_total", "counter", "Probes that got no reply")
+    for labels, metrics in labelled:
+        lines.append(f"cs2ping_probes_lost_total{{{labels}}} {metrics.lost}")
+
+    family("cs2ping_up", "gauge", "1 if the latest probe of the target was answered")
+    for labels, metrics in labelled:
+        lines.append(f"cs2ping_up{{{labels}}} {metrics.up}")
+
+    family("cs2ping_probe_duration_seconds", "histogram", "Wall time of one probe or burst")
+    for method, duration in durations:
+        histogram("cs2ping_probe_duration_seconds", f'method="{escape(method)}"', duration.copy(),
+                  DURATION_BUCKETS)
+
+    if scheduler is not None:
+        family("cs2ping_scheduler_lag_seconds", "gauge", "How late the latest engine tick started")
+        lines.append(f"cs2ping_scheduler_lag_seconds {format_value(float(scheduler.last_lag))}")
+        family("cs2ping_scheduler_missed_ticks_total", "counter", "Ticks skipped because the event loop was late")
+        lines.append(f"cs2ping_scheduler_missed_ticks_total {scheduler.missed_ticks}")
+        family("cs2ping_cycle_duration_seconds", "gauge", "Wall time of the latest tick's probes")
+        lines.append(f"cs2ping_cycle_duration_seconds {format_value(float(scheduler.last_cycle_time))}")
+        family("cs2ping_cycles_total", "counter", "Probe cycles run")
+        lines.append(f"cs2ping_cycles_total {scheduler.cycles}")
+
+    if openmetrics:
+        lines.append("# EOF")
+    return "\n".join(lines) + "\n"
+
+
+def metrics_handler():
+    """Request handler class for GET /metrics (http.server is only imported when serving)"""
+    from http.server import BaseHTTPRequestHandler
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] not in ("/metrics", "/"):
+                self.send_error(404)
+                return
+            openmetrics = "application/openmetrics-text" in self.headers.get("Accept", "")
+            body = render(self.server.collector, self.server.scheduler, openmetrics).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", OPENMETRICS_TYPE if openmetrics else PROMETHEUS_TYPE)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass  # No access log on the console
+
+    return MetricsHandler
+
+
+class MetricsServer:
+    """HTTP endpoint for a MonitorCore's metrics, on a daemon thread"""
+
+    def __init__(self, monitor, port, host=DEFAULT_HOST):
+        from http.server import ThreadingHTTPServer
+        self.server = ThreadingHTTPServer((host, port), metrics_handler())
+        self.server.daemon_threads = True
+        self.server.collector = monitor.metrics
+        self.server.scheduler = monitor.scheduler
+        self.thread = None
+
+    @property
+    def port(self):
+        return self.server.server_address[1]
+
+    def start(self):
+        self.thread = threading.Thread(target=self.server.serve_forever, name="metrics-http", daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
@@ -0,0 +1,396 @@
+#!/usr/bin/env python3
+"""
+Headless mode for the CS2 Ping Monitor
+
+Runs the same probe engine as the window, without tkinter, and streams the
+results as JSON lines or CSV to stdout or a file - for a LAN gateway, a
+container or your own tooling.
+
+Usage:
+python floating_ping_monitor.py --headless [options]
+python ping_headless.py [options]
+
+Options:
+--format jsonl|csv       output format (default jsonl)
+--output FILE            write to FILE instead of stdout (appends)
+--report-interval SECS   write the latest result of every changed target
+                         every SECS seconds; 0 = write every result as it
+                         arrives (default 0)
+--interval SECS          base probe interval per target (default 1; the engine
+                         ticks 4 times per interval)
+--timeout SECS           probe timeout (default 3)
+--duration SECS          stop after SECS seconds (default: run until killed)
+--targets HOST ...       probe these instead of the server list
+--config FILE            server list to load (default servers.json next to the
+                         script); reloaded when the file changes
+--pin HOST=IP             always probe HOST at IP instead of resolving it
+                         (repeatable; adds to / overrides servers.json resolve_to)
+--source ADDR ...        probe every target from each of these local addresses
+                         or (Linux) interfaces, "default" = default route
+                         (default: servers.json "sources", or the default route)
+--probe-rate N           global probe budget in probes per second (default 200)
+--fixed-rate             probe every target at its base interval (no adaptive
+                         backoff / slow-down)
+--burst N                send N closely spaced probes per target per cycle
+                         (rtt_ms is then the median; see burst_* columns)
+--burst-spacing MS       gap between the probes of a burst (default 20)
+--recommend FILE         keep FILE updated with the best CS2 region and the
+                         runner-up as JSON (see ping_recommend.py)
+--metrics-port PORT       serve Prometheus/OpenMetrics on http://HOST:PORT/metrics
+--metrics-host HOST      address to serve metrics on (default 127.0.0.1)
+--db FILE                also store every result in a SQLite history database
+                         (query it with ping_storage.py)
+--events FILE            append change events (down/up, RTT and loss alerts,
+                         address changes) to FILE as JSON lines (see ping_events.py)
+--webhook URL            POST every change event as JSON to URL
+--alert-rtt MS           RTT alert threshold (default: servers.json "alerts", or 150)
+--alert-loss PCT         loss alert threshold over the last 20 probes (default 10)
+--profile                profile the engine from the start (see ping_profiler.py)
+--profile-dump FILE      where the profile is saved (default ping_profile.json)
+                         when profiling is switched off and at exit
+
+Send SIGUSR1 (not on Windows) to probe every target right away, SIGUSR2 to
+switch profiling on or off.
+
+Every row: time (unix seconds), target, method, address, status
+(online/slow/error), rtt_ms, resolve_ms, the rolling-window stats
+loss_pct, jitter_ms and p95_ms, and the scheduler's decision for the target:
+interval_s (current seconds between its probes) and schedule (why: normal,
+stable, volatile, priority, backoff, deferred). In burst mode also
+burst_loss_pct, burst_spread_ms (max - min RTT) and burst_reordered (replies
+that overtook an earlier probe) for that one burst. Last comes source, the
+local address or interface the probe went out from (empty = default route).
+"""
+
+import argparse
+import csv
+import json
+import signal
+import sys
+import threading
+import time
+
+from ping_engine import DEFAULT_BURST_SPACING, MonitorCore
+from ping_events import AlertThresholds, EventLog, Webhook
+from ping_probers import split_source
+from ping_profiler import PROFILE_FILE, profiler
+from ping_recommend import write_json
+from ping_resolver import is_ip_address
+from ping_schedule import DEFAULT_PROBE_RATE
+from ping_targets import TargetRegistry, parse_sources, sourced_spec
+
+FIELDS = ["time", "target", "method", "address", "status", "rtt_ms", "resolve_ms",
+          "loss_pct", "jitter_ms", "p95_ms", "interval_s", "schedule",
+          "burst_loss_pct", "burst_spread_ms", "burst_reordered", "source"]
+
+
+def result_row(result, stats, timestamp, decision=None):
+    """Flatten a ProbeResult, its history stats and schedule decision into an output row"""
+    value = result.value
+    if isinstance(value, float):
+        status, rtt = "online", round(value, 3)
+    elif value == "timeout":
+        status, rtt = "slow", None
+    else:
+        status, rtt = "error", None
+    stats = stats or {}
+    decision = decision or {}
+    interval = decision.get("interval")
+    burst = result.burst or {}
+    spread = burst.get("spread")
+    jitter = stats.get("jitter")
+    p95 = stats.get("p95")
+    return {
+        "time": round(timestamp, 3),
+        "target": result.target,
+        "method": result.method,
+        "address": result.address,
+        "status": status,
+        "rtt_ms": rtt,
+        "resolve_ms": round(result.resolve_ms, 3),
+        "loss_pct": round(stats.get("loss_pct", 0.0), 2),
+        "jitter_ms": round(jitter, 3) if jitter is not None else None,
+        "p95_ms": round(p95, 3) if p95 is not None else None,
+        "interval_s": round(interval, 3) if interval is not None else None,
+        "schedule": decision.get("reason"),
+        "burst_loss_pct": round(burst["loss_pct"], 2) if burst else None,
+        "burst_spread_ms": round(spread, 3) if spread is not None else None,
+        "burst_reordered": burst.get("reordered"),
+        "source": split_source(result.target)[1],
+    }
+
+
+class JsonLinesWriter:
+    """One JSON object per line"""
+
+    def __init__(self, stream):
+        self.stream = stream
+
+    def write(self, row):
+        self.stream.write(json.dumps(row, separators=(",", ":")) + "\n")
+
+    def flush(self):
+        self.stream.flush()
+
+
+class CsvWriter:
+    """CSV with a header row; missing values are empty cells"""
+
+    def __init__(self, stream):
+        self.stream = stream
+        self.writer = csv.DictWriter(stream, fieldnames=FIELDS, lineterminator="\n")
+        self.writer.writeheader()
+
+    def write(self, row):
+        self.writer.writerow(row)
+
+    def flush(self):
+        self.stream.flush()
+
+
+WRITERS = {"jsonl": JsonLinesWriter, "csv": CsvWriter}
+RELOAD_INTERVAL = 2.0  # seconds between servers.json change checks
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog="floating_ping_monitor.py --headless",
+        description="CS2 Ping Monitor without a window - streams results as JSON lines or CSV"
+    )
+    parser.add_argument("--headless", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--format", choices=sorted(WRITERS), default="jsonl")
+    parser.add_argument("--output", default="-", help="file to append to (default: stdout)")
+    parser.add_argument("--report-interval", type=float, default=0.0,
+                        help="seconds between reports; 0 = every result as it arrives")
+    parser.add_argument("--interval", type=float, default=1.0, help="base probe interval per target")
+    parser.add_argument("--timeout", type=float, default=3.0, help="probe timeout")
+    parser.add_argument("--duration", type=float, default=None, help="stop after this many seconds")
+    parser.add_argument("--targets", nargs="+", default=None, help="hosts to probe")
+    parser.add_argument("--config", default=None, help="server list (default: servers.json)")
+    parser.add_argument("--pin", action="append", default=[], metavar="HOST=IP",
+                        help="probe HOST at IP instead of resolving it (repeatable)")
+    parser.add_argument("--source", nargs="+", default=None,
+                        help="local addresses or interfaces to probe every target from")
+    parser.add_argument("--probe-rate", type=float, default=DEFAULT_PROBE_RATE,
+                        help="global probe budget (probes per second)")
+    parser.add_argument("--fixed-rate", action="store_true",
+                        help="probe every target at its base interval, no adaptive scheduling")
+    parser.add_argument("--burst", type=int, default=1, help="probes per target per cycle")
+    parser.add_argument("--burst-spacing", type=float, default=DEFAULT_BURST_SPACING * 1000,
+                        help="ms between the probes of a burst")
+    parser.add_argument("--recommend", default=None, help="JSON file kept updated with the best region")
+    parser.add_argument("--metrics-port", type=int, default=None, help="serve /metrics on this port")
+    parser.add_argument("--metrics-host", default="127.0.0.1", help="address to serve /metrics on")
+    parser.add_argument("--db", default=None, help="SQLite history database to store results in")
+    parser.add_argument("--events", default=None, help="file to append change events to (JSON lines)")
+    parser.add_argument("--webhook", default=None, help="URL every change event is POSTed to")
+    parser.add_argument("--alert-rtt", type=float, default=None, help="RTT alert threshold in ms")
+    parser.add_argument("--alert-loss", type=float, default=None, help="loss alert threshold in %%")
+    parser.add_argument("--profile", action="store_true", help="profile the engine from the start")
+    parser.add_argument("--profile-dump", default=PROFILE_FILE, help="file the profile is saved to")
+    return parser
+
+
+def alert_overrides(args):
+    """Alert thresholds given on the command line, as servers.json "alerts" keys"""
+    overrides = {}
+    if args.alert_rtt is not None:
+        overrides["rtt_ms"] = args.alert_rtt
+    if args.alert_loss is not None:
+        overrides["loss_pct"] = args.alert_loss
+    return overrides
+
+
+def parse_pins(pins):
+    """{host: address} from --pin HOST=IP options"""
+    parsed = {}
+    for pin in pins:
+        host, _, address = pin.partition("=")
+        if not host or not is_ip_address(address):
+            raise argparse.ArgumentTypeError(f"--pin expects HOST=IP, got {pin!r}")
+        parsed[host] = address
+    return parsed
+
+
+def reload_targets(monitor, registry, overrides=None, pins=None):
+    """Apply servers.json edits to the running engine"""
+    changes = registry.poll()
+    if changes is not None:
+        monitor.set_targets(registry.targets(), registry.intervals(), registry.priority(),
+                            registry.regions(), registry.alerts(overrides),
+                            dict(registry.pins(), **(pins or {})))
+
+
+class RecommendationFile:
+    """Rewrites the recommendation file whenever the best region or runner-up change"""
+
+    def __init__(self, monitor, path):
+        self.monitor = monitor
+        self.path = path
+        self.version = 0
+
+    def update(self):
+        recommender = self.monitor.recommender
+        if recommender.version != self.version:
+            self.version = recommender.version
+            write_json(self.path, recommender.recommendation())
+
+
+class ProfileSwitch:
+    """Toggles profiling on request (SIGUSR2) and saves the profile when it stops
+
+    The signal handler only sets a flag; the switch happens on the streaming
+    loop, so the handler never waits on the profiler's lock.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.requested = False
+
+    def request(self):
+        self.requested = True
+
+    def update(self):
+        if self.requested:
+            self.requested = False
+            if not profiler.toggle():
+                profiler.dump(self.path)
+
+    def close(self):
+        if profiler.enabled:
+            profiler.disable()
+            profiler.dump(self.path)
+
+
+def stream_results(monitor, writer, report_interval, stop, registry=None, recommendation=None,
+                   profile=None, overrides=None, pins=None):
+    """Write results until stop is set"""
+    next_reload = time.monotonic() + RELOAD_INTERVAL
+    if report_interval <= 0:
+        # Every result, in arrival order
+        while not stop.is_set():
+            if recommendation is not None:
+                recommendation.update()
+            if profile is not None:
+                profile.update()
+            if profiler.enabled:
+                profiler.gauge("ui_queue", monitor.results.qsize())
+            results = monitor.drain()
+            schedule = monitor.schedule() if results else {}
+            for result in results:
+                writer.write(result_row(result, monitor.history.stats(result.target), time.time(),
+                                        schedule.get(result.target)))
+            writer.flush()
+            if registry is not None and time.monotonic() >= next_reload:
+                reload_targets(monitor, registry, overrides, pins)
+                next_reload = time.monotonic() + RELOAD_INTERVAL
+            stop.wait(0.05)
+        return
+
+    # Latest result per changed target, once per report interval
+    while not stop.wait(report_interval):
+        if registry is not None:
+            reload_targets(monitor, registry, overrides, pins)
+        if recommendation is not None:
+            recommendation.update()
+        if profile is not None:
+            profile.update()
+        now = time.time()
+        schedule = monitor.schedule()
+        changes = monitor.latest.take_changes()
+        if profiler.enabled:
+            profiler.gauge("ui_queue", len(changes))
+        for target, result in changes.items():
+            writer.write(result_row(result, monitor.history.stats(target), now, schedule.get(target)))
+        writer.flush()
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    registry = None
+    overrides = alert_overrides(args)
+    try:
+        pins = parse_pins(args.pin)
+    except argparse.ArgumentTypeError as e:
+        parser.error(str(e))
+    if args.targets:
+        # Every target given on the command line is ranked as its own region,
+        # which each source's path to it competes for
+        sources = parse_sources(args.source) if args.source else [None]
+        regions = {sourced_spec(target, source): target for target in args.targets for source in sources}
+        targets, intervals, priority = list(regions), None, None
+        alerts = AlertThresholds.from_config(overrides)
+    else:
+        registry = TargetRegistry(args.config, args.source)
+        targets, intervals, priority = registry.targets(), registry.intervals(), registry.priority()
+        regions = registry.regions()
+        alerts = registry.alerts(overrides)
+        pins = dict(registry.pins(), **pins)
+
+    if args.output == "-":
+        stream = sys.stdout
+    else:
+        stream = open(args.output, "a", newline="", encoding="utf-8")
+    writer = WRITERS[args.format](stream)
+
+    storage = None
+    if args.db:
+        from ping_storage import StorageWriter  # sqlite3 only when asked for
+        storage = StorageWriter(args.db).start()
+    monitor = MonitorCore(targets, interval=args.interval, timeout=args.timeout,
+                          queue_results=args.report_interval <= 0, storage=storage,
+                          intervals=intervals, priority=priority, probe_rate=args.probe_rate,
+                          adaptive=not args.fixed_rate, regions=regions,
+                          burst_count=max(1, args.burst), burst_spacing=args.burst_spacing / 1000.0,
+                          alerts=alerts, pins=pins)
+    event_log = None
+    if args.events:
+        event_log = monitor.events.stream.subscribe(EventLog(args.events))
+    if args.webhook:
+        monitor.events.stream.subscribe(Webhook(args.webhook))
+    recommendation = RecommendationFile(monitor, args.recommend) if args.recommend else None
+    exporter = None
+    if args.metrics_port is not None:
+        from ping_exporter import MetricsServer  # http.server only when asked for
+        exporter = MetricsServer(monitor, args.metrics_port, args.metrics_host).start()
+    profile = ProfileSwitch(args.profile_dump)
+    if args.profile:
+        profiler.enable()
+    stop = threading.Event()
+    signal.signal(signal.SIGTERM, lambda signum, frame: stop.set())
+    if hasattr(signal, "SIGUSR1"):
+        # kill -USR1 <pid> probes every target right away
+        signal.signal(signal.SIGUSR1, lambda signum, frame: monitor.refresh())
+        # kill -USR2 <pid> switches profiling on or off
+        signal.signal(signal.SIGUSR2, lambda signum, frame: profile.request())
+    if args.duration is not None:
+        timer = threading.Timer(args.duration, stop.set)
+        timer.daemon = True
+        timer.start()
+
+    monitor.start()
+    try:
+        stream_results(monitor, writer, args.report_interval, stop, registry, recommendation, profile,
+                       overrides, pins)
+    except KeyboardInterrupt:
+        pass
+    except BrokenPipeError:
+        return 0  # Reader went away (e.g. piped into head)
+    finally:
+        monitor.stop(timeout=args.timeout + 2)
+        profile.close()
+        monitor.events.stream.stop(timeout=5)  # Deliver the last events
+        if event_log is not None:
+            event_log.close()
+        if exporter is not None:
+            exporter.stop()
+        if storage is not None:
+            storage.stop(timeout=10)
+        if stream is not sys.stdout:
+            stream.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,274 @@
+"""
+Rolling latency history for the CS2 Ping Monitor
+
+Every target keeps a fixed-size window of samples (default 1 hour at 1 Hz) in
+array-backed ring buffers, so memory stays bounded and predictable no matter
+how long the session runs (~100 KB per target for 3600 samples).
+
+Statistics are maintained incrementally as samples arrive and fall out of the
+window instead of being recomputed from scratch:
+
+- count / loss %          O(1) counters
+- avg / stddev            O(1) running sums (re-summed once per window wrap
+                          so floating point drift can't build up)
+- jitter                  O(1) mean absolute difference between consecutive
+                          replies (RFC 3550 style)
+- min / max               O(1) amortized monotonic queues
+- p50 / p95 / p99         O(log n) Fenwick tree over log-spaced RTT buckets
+                          (about 1% resolution)
+
+In burst mode every probe of a burst is a sample, so the window covers
+window / burst size cycles.
+"""
+
+import math
+import threading
+from array import array
+from collections import deque
+
+DEFAULT_WINDOW = 3600  # samples kept per target (1 hour at 1 Hz)
+
+# Percentile buckets: log-spaced from 0.01 ms to 60 s, ~2% wide
+BUCKET_MIN_MS = 0.01
+BUCKET_RATIO = 1.02
+BUCKET_COUNT = int(math.log(60000.0 / BUCKET_MIN_MS) / math.log(BUCKET_RATIO)) + 2
+_LOG_RATIO = math.log(BUCKET_RATIO)
+
+LOST = float("nan")
+
+
+def bucket_of(rtt):
+    """Histogram bucket index of an RTT in ms"""
+    if rtt <= BUCKET_MIN_MS:
+        return 0
+    return min(BUCKET_COUNT - 1, int(math.log(rtt / BUCKET_MIN_MS) / _LOG_RATIO) + 1)
+
+
+def bucket_value(index):
+    """Representative RTT of a bucket (geometric middle)"""
+    if index == 0:
+        return BUCKET_MIN_MS
+    return BUCKET_MIN_MS * BUCKET_RATIO ** (index - 0.5)
+
+
+class LatencyHistory:
+    """Ring buffer of (timestamp, rtt) samples for one target with incremental stats"""
+
+    def __init__(self, window=DEFAULT_WINDOW):
+        self.window = window
+        self.timestamps = array("d", bytes(8 * window))
+        self.rtts = array("d", bytes(8 * window))
+        self.diffs = array("d", bytes(8 * window))  # |rtt - previous reply|, NaN if none
+        self.tree = array("l", bytes(array("l").itemsize * (BUCKET_COUNT + 1)))
+        self.head = 0    # slot the next sample goes into
+        self.count = 0   # samples currently in the window
+        self.total = 0   # samples ever added (monotonic sample index)
+        self.lost = 0
+        self.sum = 0.0
+        self.sum_sq = 0.0
+        self.diff_sum = 0.0
+        self.diff_count = 0
+        self.last_reply = None
+        self._min = deque()  # sample indices with increasing RTTs
+        self._max = deque()  # sample indices with decreasing RTTs
+
+    # Fenwick tree over RTT buckets
+
+    def _tree_add(self, bucket, delta):
+        i = bucket + 1
+        tree = self.tree
+        while i <= BUCKET_COUNT:
+            tree[i] += delta
+            i += i & -i
+
+    def _tree_find(self, rank):
+        """Bucket holding the rank-th smallest reply (1-based)"""
+        position = 0
+        step = 1 << BUCKET_COUNT.bit_length()
+        tree = self.tree
+        while step:
+            nxt = position + step
+            if nxt <= BUCKET_COUNT and tree[nxt] < rank:
+                position = nxt
+                rank -= tree[nxt]
+            step >>= 1
+        return position  # 0-based bucket index
+
+    def add(self, timestamp, rtt):
+        """Record one sample; rtt is ms, or None for a lost probe"""
+        if rtt is None:
+            rtt = LOST
+        slot = self.head
+        if self.count == self.window:
+            self._evict(slot)
+        else:
+            self.count += 1
+
+        self.timestamps[slot] = timestamp
+        self.rtts[slot] = rtt
+        index = self.total
+        if rtt != rtt:  # NaN - lost
+            self.lost += 1
+            self.diffs[slot] = LOST
+        else:
+            self.sum += rtt
+            self.sum_sq += rtt * rtt
+            self._tree_add(bucket_of(rtt), 1)
+            if self.last_reply is not None:
+                diff = abs(rtt - self.last_reply)
+                self.diffs[slot] = diff
+                self.diff_sum += diff
+                self.diff_count += 1
+            else:
+                self.diffs[slot] = LOST
+            self.last_reply = rtt
+            while self._min and self.rtts[self._min[-1] % self.window] >= rtt:
+                self._min.pop()
+            self._min.append(index)
+            while self._max and self.rtts[self._max[-1] % self.window] <= rtt:
+                self._max.pop()
+            self._max.append(index)
+
+        self.total += 1
+        self.head = (slot + 1) % self.window
+        if self.head == 0:
+            self._resum()
+
+    def _evict(self, slot):
+        """Remove the oldest sample (about to be overwritten) from the stats"""
+        rtt = self.rtts[slot]
+        if rtt != rtt:
+            self.lost -= 1
+        else:
+            self.sum -= rtt
+            self.sum_sq -= rtt * rtt
+            self._tree_add(bucket_of(rtt), -1)
+        diff = self.diffs[slot]
+        if diff == diff:
+            self.diff_sum -= diff
+            self.diff_count -= 1
+        oldest = self.total - self.window
+        if self._min and self._min[0] == oldest:
+            self._min.popleft()
+        if self._max and self._max[0] == oldest:
+            self._max.popleft()
+
+    def _resum(self):
+        """Recompute the running sums exactly (once per window wrap)"""
+        total = total_sq = diff_sum = 0.0
+        for i in range(self.count):
+            rtt = self.rtts[i]
+            if rtt == rtt:
+                total += rtt
+                total_sq += rtt * rtt
+            diff = self.diffs[i]
+            if diff == diff:
+                diff_sum += diff
+        self.sum, self.sum_sq, self.diff_sum = total, total_sq, diff_sum
+
+    @property
+    def received(self):
+        return self.count - self.lost
+
+    def percentile(self, q):
+        """Approximate q-th percentile (0-100) of the replies in the window"""
+        received = self.received
+        if received == 0:
+            return None
+        rank = max(1, int(math.ceil(q / 100.0 * received)))
+        value = bucket_value(self._tree_find(rank))
+        # Clamp to the exact extremes so p0/p100 and tiny windows stay honest
+        return min(max(value, self.min), self.max)
+
+    @property
+    def min(self):
+        return self.rtts[self._min[0] % self.window] if self._min else None
+
+    @property
+    def max(self):
+        return self.rtts[self._max[0] % self.window] if self._max else None
+
+    def stats(self):
+        """Summary of the current window"""
+        received = self.received
+        if received:
+            avg = self.sum / received
+            variance = max(0.0, self.sum_sq / received - avg * avg)
+            stddev = math.sqrt(variance)
+        else:
+            avg = stddev = None
+        return {
+            "samples": self.count,
+            "received": received,
+            "lost": self.lost,
+            "loss_pct": 100.0 * self.lost / self.count if self.count else 0.0,
+            "min": self.min,
+            "avg": avg,
+            "max": self.max,
+            "stddev": stddev,
+            "jitter": self.diff_sum / self.diff_count if self.diff_count else None,
+            "p50": self.percentile(50),
+            "p95": self.percentile(95),
+            "p99": self.percentile(99),
+        }
+
+    def samples(self):
+        """(timestamp, rtt or None) pairs, oldest first"""
+        start = (self.head - self.count) % self.window
+        result = []
+        for i in range(self.count):
+            slot = (start + i) % self.window
+            rtt = self.rtts[slot]
+            result.append((self.timestamps[slot], None if rtt != rtt else rtt))
+        return result
+
+    def nbytes(self):
+        """Bytes held by the fixed-size buffers"""
+        return sum(a.itemsize * len(a) for a in (self.timestamps, self.rtts, self.diffs, self.tree))
+
+
+def samples_of(result):
+    """RTTs (ms, or None for lost) a ProbeResult contributes - one, or every probe of a burst"""
+    if result.burst is not None:
+        return result.burst["rtts"]
+    return [result.value if isinstance(result.value, float) else None]
+
+
+class HistoryStore:
+    """Latency history for every target (safe to read from other threads)"""
+
+    def __init__(self, window=DEFAULT_WINDOW):
+        self.window = window
+        self.histories = {}
+        self.lock = threading.Lock()
+
+    def record(self, result, timestamp):
+        """Add a ProbeResult; anything but a float RTT counts as lost"""
+        with self.lock:
+            history = self.histories.get(result.target)
+            if history is None:
+                history = self.histories[result.target] = LatencyHistory(self.window)
+            for rtt in samples_of(result):
+                history.add(timestamp, rtt)
+
+    def stats(self, target):
+        with self.lock:
+            history = self.histories.get(target)
+            return history.stats() if history is not None else None
+
+    def all_stats(self):
+        with self.lock:
+            return {target: history.stats() for target, history in self.histories.items()}
+
+    def samples(self, target):
+        with self.lock:
+            history = self.histories.get(target)
+            return history.samples() if history is not None else []
+
+    def discard(self, target):
+        with self.lock:
+            self.histories.pop(target, None)
+
+    def nbytes(self):
+        with self.lock:
+            return sum(history.nbytes() for history in self.histories.values())
@@ -0,0 +1,175 @@
+"""
+Virtualized server list for the CS2 Ping Monitor
+
+Draws the server list as Canvas items and only for the rows in view: a small
+pool of row slots (background, name, ping) is re-bound to whichever rows are
+visible whenever the list scrolls or resizes. Build time, memory and scroll
+cost therefore stay flat whether the list holds 30 or 5000 targets.
+"""
+
+import tkinter as tk
+
+ROW_HEIGHT = 26    # every row (category header, server, spacer) has the same height
+LIST_PADDING = 10  # blank space above the first row
+
+CATEGORY_FONT = ("Courier New", 12, "bold")
+SERVER_FONT = ("Courier New", 10)
+PING_FONT = ("Courier New", 10, "bold")
+
+DEFAULT_VALUE = ("-- ms", "#00ff88")
+
+
+class VirtualServerList:
+    """Scrollable list of categories and servers that only draws visible rows"""
+
+    def __init__(self, parent, categories=None):
+        self.canvas = tk.Canvas(
+            parent,
+            bg='#111111',  # Darker background for canvas
+            highlightthickness=0,
+            relief='sunken',
+            bd=1,
+            yscrollincrement=ROW_HEIGHT
+        )
+        self.scrollbar = tk.Scrollbar(
+            parent,
+            orient="vertical",
+            command=self.yview,
+            bg='#333333',
+            troughcolor='#222222',
+            width=20
+        )
+        self.canvas.configure(yscrollcommand=self.scrollbar.set)
+        self.canvas.pack(side="left", fill="both", expand=True)
+        self.scrollbar.pack(side="right", fill="y")
+
+        self.rows = []      # (kind, key, text, stripe): kind is "category", "server" or "spacer"
+        self.header = ""    # shown in the ping column of category rows (e.g. source names)
+        self.values = {}    # server -> (text, color) shown in the ping column
+        self.slots = []     # pool of drawn rows: [row index, bg id, name id, ping id]
+        self.width = 1
+        self.height = 1
+        self.redraws = 0
+
+        self.canvas.bind("<Configure>", self._on_configure)
+        self.set_categories(categories or {})
+
+    def set_categories(self, categories, header=""):
+        """Replace the rows with {category: [server or (server, label)]} (values are kept)"""
+        self.rows = []
+        self.header = header
+        for category, servers in categories.items():
+            if self.rows:
+                self.rows.append(("spacer", None, "", 0))  # Extra space between categories
+            self.rows.append(("category", category, f"📡 {category}", 0))
+            for i, server in enumerate(servers):
+                server, label = server if isinstance(server, tuple) else (server, server)
+                self.rows.append(("server", server, f"🔹 {label}", i % 2))
+        total = self._update_scrollregion()
+        if self.canvas.canvasy(0) > max(0, total - self.height):
+            self.canvas.yview_moveto(0)  # The list shrank below the current view
+        self.redraw(force=True)
+
+    def servers(self):
+        """Every server in list order (duplicates included)"""
+        return [key for kind, key, _, _ in self.rows if kind == "server"]
+
+    def visible_servers(self):
+        """Servers whose rows are currently drawn, top to bottom"""
+        rows = sorted(slot[0] for slot in self.slots if slot[0] is not None)
+        return [self.rows[row][1] for row in rows if self.rows[row][0] == "server"]
+
+    def _update_scrollregion(self):
+        total = LIST_PADDING * 2 + ROW_HEIGHT * len(self.rows)
+        self.canvas.configure(scrollregion=(0, 0, self.width, total))
+        return total
+
+    def _on_configure(self, event):
+        if (event.width, event.height) == (self.width, self.height):
+            return
+        self.width, self.height = event.width, event.height
+        self._update_scrollregion()
+        self.redraw(force=True)
+
+    def yview(self, *args):
+        """Scrollbar command - scroll the canvas, then re-bind the row pool"""
+        self.canvas.yview(*args)
+        self.redraw()
+
+    def scroll(self, units):
+        """Scroll by whole rows (mouse wheel)"""
+        self.canvas.yview_scroll(units, "units")
+        self.redraw()
+
+    def _new_slot(self):
+        bg = self.canvas.create_rectangle(0, 0, 0, 0, width=0)
+        name = self.canvas.create_text(0, 0, anchor='w')
+        ping = self.canvas.create_text(0, 0, anchor='e', font=PING_FONT)
+        slot = [None, bg, name, ping]
+        self.slots.append(slot)
+        return slot
+
+    def redraw(self, force=False):
+        """Bind the slot pool to the rows in view"""
+        self.redraws += 1
+        top = max(0, int(self.canvas.canvasy(0)) - LIST_PADDING)
+        first = top // ROW_HEIGHT
+        needed = self.height // ROW_HEIGHT + 2
+        while len(self.slots) < needed:
+            self._new_slot()
+
+        # Slots already showing a row that stays in view keep it
+        wanted = range(first, min(first + needed, len(self.rows)))
+        kept = {}
+        free = []
+        for slot in self.slots:
+            if not force and slot[0] is not None and slot[0] in wanted and slot[0] not in kept:
+                kept[slot[0]] = slot
+            else:
+                free.append(slot)
+        for row in wanted:
+            if row not in kept:
+                self._bind(free.pop(), row)
+        for slot in free:
+            if slot[0] is not None:
+                slot[0] = None
+                for item in slot[1:]:
+                    self.canvas.itemconfigure(item, state='hidden')
+
+    def _bind(self, slot, row):
+        """Draw row into slot"""
+        slot[0] = row
+        kind, key, text, stripe = self.rows[row]
+        _, bg, name, ping = slot
+        y = LIST_PADDING + row * ROW_HEIGHT
+        canvas = self.canvas
+        canvas.coords(bg, 5, y + 1, self.width - 5, y + ROW_HEIGHT - 1)
+        canvas.coords(name, 15, y + ROW_HEIGHT // 2)
+        canvas.coords(ping, self.width - 15, y + ROW_HEIGHT // 2)
+        if kind == "category":
+            canvas.itemconfigure(bg, fill='#222222', state='normal')  # Dark gray background
+            canvas.itemconfigure(name, text=text, font=CATEGORY_FONT, fill='#ffaa00', state='normal')
+            if self.header:
+                canvas.itemconfigure(ping, text=self.header, font=SERVER_FONT, fill='#888888', state='normal')
+            else:
+                canvas.itemconfigure(ping, state='hidden')
+        elif kind == "server":
+            # Alternating backgrounds
+            canvas.itemconfigure(bg, fill='#151515' if stripe else '#1a1a1a', state='normal')
+            canvas.itemconfigure(name, text=text, font=SERVER_FONT, fill='#ffffff', state='normal')
+            value, color = self.values.get(key, DEFAULT_VALUE)
+            canvas.itemconfigure(ping, text=value, font=PING_FONT, fill=color, state='normal')
+        else:
+            for item in slot[1:]:
+                canvas.itemconfigure(item, state='hidden')
+
+    def set_value(self, server, text, color):
+        """Set a server's ping text; only touches the canvas if the row is in view"""
+        if self.values.get(server) == (text, color):
+            return False
+        self.values[server] = (text, color)
+        for slot in self.slots:
+            row = slot[0]
+            if row is not None and self.rows[row][1] == server and self.rows[row][0] == "server":
+                self.canvas.itemconfigure(slot[3], text=text, fill=color)
+        return True
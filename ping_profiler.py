@@ -0,0 +1,181 @@
+"""
+Self-instrumentation for the CS2 Ping Monitor
+
+Times the monitor's own work so slow spots show up in numbers instead of
+guesses. Off by default; toggle it at runtime (F4 in the window, SIGUSR2 or
+--profile in headless mode). While it is off every hook is a single
+attribute check, so leaving the hooks in costs nothing measurable.
+
+Stage timings (reported in ms, window of the last STAGE_WINDOW samples each, with
+p50/p95/p99 - see ping_history.LatencyHistory):
+
+    dns          hostname lookups (ping_resolver.py)
+    spawn        starting a ping process (subprocess prober)
+    parse        decoding a reply (ICMP packet or ping output)
+    slot_wait    waiting for a free concurrency slot
+    probe        one probe or burst, send to reply / timeout
+    dispatch     handing one result to history, recommender, metrics, storage
+    cycle        the probes started on one tick, first start to last result
+    cpu_per_probe  engine thread CPU time per probe sent, tick to tick
+    ui_frame     one Tk frame applying results
+
+Gauges (last, mean and max):
+
+    cycle_load   cycle wall time as % of the base interval, jitter spread
+                 included (over 100 = a tick's probes took longer than an interval;
+                 later ticks still start on time)
+    lag_ms       how late the engine tick started
+    due          targets due on a tick
+    ui_queue     targets changed since the last frame (window) or results
+                 waiting in the results queue per drain (headless)
+
+snapshot() returns everything as plain dicts, overlay_text() as a few lines
+for the window's overlay panel and dump() writes the snapshot as JSON.
+"""
+
+import json
+import os
+import threading
+import time
+
+from ping_history import LatencyHistory
+
+STAGE_WINDOW = 2048  # samples kept per stage
+PROFILE_FILE = "ping_profile.json"
+STAGES = ("dns", "spawn", "parse", "slot_wait", "probe", "dispatch", "cycle", "cpu_per_probe",
+          "ui_frame")
+GAUGES = ("cycle_load", "lag_ms", "due", "ui_queue")
+
+
+class Gauge:
+    """Last, mean and max of a sampled value"""
+
+    __slots__ = ("last", "total", "count", "max")
+
+    def __init__(self):
+        self.last = None
+        self.total = 0.0
+        self.count = 0
+        self.max = None
+
+    def set(self, value):
+        self.last = value
+        self.total += value
+        self.count += 1
+        if self.max is None or value > self.max:
+            self.max = value
+
+    def stats(self):
+        return {"last": self.last, "mean": self.total / self.count if self.count else None,
+                "max": self.max, "samples": self.count}
+
+
+class Profiler:
+    """Per-stage timing windows and gauges, fed by hooks in the engine and the UI
+
+    Hooks check `profiler.enabled` before taking any timestamp:
+
+        started = time.perf_counter() if profiler.enabled else None
+        ...
+        if started is not None:
+            profiler.stage("parse", time.perf_counter() - started)
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.stages = {name: LatencyHistory(STAGE_WINDOW) for name in STAGES}
+            self.counts = dict.fromkeys(STAGES, 0)   # samples since enable (the window keeps fewer)
+            self.totals = dict.fromkeys(STAGES, 0.0)  # ms since enable
+            self.gauges = {name: Gauge() for name in GAUGES}
+            self.started = time.time()
+            self.cpu_started = time.process_time()
+
+    def enable(self):
+        """Start profiling from a clean slate"""
+        self.reset()
+        self.enabled = True
+
+    def disable(self):
+        self.enabled = False
+
+    def toggle(self):
+        """Switch profiling on or off; returns the new state"""
+        if self.enabled:
+            self.disable()
+        else:
+            self.enable()
+        return self.enabled
+
+    def stage(self, name, seconds):
+        """Record one timing of a stage (seconds)"""
+        # ms like every other history: buckets span 10 us to 60 s, so a slow
+        # cycle keeps its percentiles (means and maxima stay exact below 10 us)
+        ms = seconds * 1000.0
+        with self.lock:
+            self.stages[name].add(0.0, ms)
+            self.counts[name] += 1
+            self.totals[name] += ms
+
+    def gauge(self, name, value):
+        with self.lock:
+            self.gauges[name].set(value)
+
+    def snapshot(self):
+        """Everything recorded since profiling was enabled, as plain dicts"""
+        with self.lock:
+            elapsed = max(time.time() - self.started, 1e-9)
+            stages = {}
+            for name in STAGES:
+                if not self.counts[name]:
+                    continue
+                stats = self.stages[name].stats()
+                stages[name] = {
+                    "count": self.counts[name],
+                    "per_s": round(self.counts[name] / elapsed, 3),
+                    "total_ms": round(self.totals[name], 3),
+                    "mean_ms": round(self.totals[name] / self.counts[name], 4),
+                }
+                for key in ("p50", "p95", "p99", "max"):
+                    stages[name][f"{key}_ms"] = round(stats[key], 4)
+            gauges = {name: gauge.stats() for name, gauge in self.gauges.items() if gauge.count}
+            return {
+                "enabled": self.enabled,
+                "started": self.started,
+                "elapsed_s": round(elapsed, 3),
+                "process_cpu_pct": round(100.0 * (time.process_time() - self.cpu_started) / elapsed, 2),
+                "stages": stages,
+                "gauges": gauges,
+            }
+
+    def overlay_text(self):
+        """A few fixed-width lines for an overlay panel"""
+        snapshot = self.snapshot()
+        lines = [f"PROFILE {snapshot['elapsed_s']:.0f}s  CPU {snapshot['process_cpu_pct']:.1f}%",
+                 f"{'stage':<13}{'n/s':>7}{'p50':>8}{'p95':>8}{'max':>8}"]
+        for name, stats in snapshot["stages"].items():
+            lines.append(f"{name:<13}{stats['per_s']:>7.1f}{stats['p50_ms']:>8.2f}"
+                         f"{stats['p95_ms']:>8.2f}{stats['max_ms']:>8.2f}")
+        for name, stats in snapshot["gauges"].items():
+            lines.append(f"{name:<13} last {stats['last']:.1f} mean {stats['mean']:.1f} max {stats['max']:.1f}")
+        return "\n".join(lines)
+
+    def dump(self, path):
+        """Write the snapshot as JSON (atomically); returns the path or None on error"""
+        temp = f"{path}.tmp"
+        try:
+            with open(temp, "w", encoding="utf-8") as f:
+                json.dump(self.snapshot(), f, indent=2)
+            os.replace(temp, path)
+        except OSError as e:
+            print(f"Error writing {path}: {e}")
+            return None
+        return path
+
+
+# The one profiler every hook reports to
+profiler = Profiler()
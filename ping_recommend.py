@@ -0,0 +1,168 @@
+"""
+Best-server recommender for the CS2 Ping Monitor
+
+Ranks CS2 regions by a score built from a short sliding window of samples
+per target (default the last 60), not from the last ping alone:
+
+    score = median RTT + JITTER_WEIGHT x jitter + LOSS_WEIGHT x loss %
+
+(lower is better). A region's score is the score of its best server, so a
+region with a backup relay is only as good as the better of the two. Scores
+are updated incrementally as each sample arrives (see ping_history.py).
+
+The recommendation is sticky: a challenger only replaces the current best
+region once it beats it by SWITCH_MARGIN_MS (or SWITCH_MARGIN_PCT, whichever
+is larger) for SWITCH_HOLD seconds in a row, so two regions a few ms apart
+don't flip back and forth. If the current best stops answering the switch
+is immediate.
+
+recommendation() returns plain dicts; write_json() saves them atomically
+for launcher scripts (the window writes best_server.json, headless mode
+--recommend FILE):
+
+{"best": {"region": "Paris", "score": 31.2, "median_ms": 28.0, "jitter_ms": 1.1,
+          "loss_pct": 0.0, "target": "185.25.182.1", "samples": 60},
+ "runner_up": {...}, "since": 1760000000.0, "updated": 1760000042.5,
+ "ranking": [{...}, ...]}
+"""
+
+import json
+import os
+import threading
+import time
+
+from ping_history import LatencyHistory, samples_of
+
+SCORE_WINDOW = 60         # samples per target the score is computed from
+MIN_SAMPLES = 5           # samples a target needs before it is ranked
+JITTER_WEIGHT = 2.0       # ms of score per ms of jitter
+LOSS_WEIGHT = 10.0        # ms of score per % of loss
+SWITCH_MARGIN_MS = 5.0    # a challenger must be this much better...
+SWITCH_MARGIN_PCT = 10.0  # ...or this % better, whichever is larger...
+SWITCH_HOLD = 10.0        # ...for this many seconds before the best region changes
+
+
+def score_of(history):
+    """(score, details) for one target's window, or None if it can't be ranked yet"""
+    if history.count < MIN_SAMPLES:
+        return None
+    stats = history.stats()
+    median = stats["p50"]
+    if median is None:
+        return float("inf"), {"median_ms": None, "jitter_ms": None,
+                              "loss_pct": stats["loss_pct"], "samples": stats["samples"]}
+    jitter = stats["jitter"] or 0.0
+    score = median + JITTER_WEIGHT * jitter + LOSS_WEIGHT * stats["loss_pct"]
+    return score, {"median_ms": median, "jitter_ms": jitter,
+                   "loss_pct": stats["loss_pct"], "samples": stats["samples"]}
+
+
+class Recommender:
+    """Incremental region ranking with hysteresis (safe to read from other threads)"""
+
+    def __init__(self, regions=None, window=SCORE_WINDOW):
+        self.window = window
+        self.regions = dict(regions or {})  # target -> region; other targets are ignored
+        self.histories = {}
+        self.scores = {}   # target -> (score, details)
+        self.best = None
+        self.runner_up = None
+        self.since = None
+        self.challenger = None  # (region, first seen ahead at)
+        self.version = 0        # bumped whenever best or runner-up change
+        self.lock = threading.Lock()
+
+    def set_regions(self, regions):
+        """Apply a new target -> region map (hot reload)"""
+        with self.lock:
+            self.regions = dict(regions or {})
+            for target in list(self.histories):
+                if target not in self.regions:
+                    del self.histories[target]
+                    self.scores.pop(target, None)
+            self._evaluate(time.time())
+
+    def record(self, result, timestamp):
+        """Add a ProbeResult and re-rank (engine thread)"""
+        if result.target not in self.regions:
+            return
+        with self.lock:
+            history = self.histories.get(result.target)
+            if history is None:
+                history = self.histories[result.target] = LatencyHistory(self.window)
+            for rtt in samples_of(result):
+                history.add(timestamp, rtt)
+            scored = score_of(history)
+            if scored is None:
+                return
+            self.scores[result.target] = scored
+            self._evaluate(timestamp)
+
+    def _ranking(self):
+        """[(score, region, target, details)] best first, one entry per region"""
+        best = {}
+        for target, (score, details) in self.scores.items():
+            region = self.regions.get(target)
+            if region is not None and (region not in best or score < best[region][0]):
+                best[region] = (score, region, target, details)
+        return sorted(best.values(), key=lambda item: (item[0], item[1]))
+
+    def _evaluate(self, now):
+        ranking = [item for item in self._ranking() if item[0] != float("inf")]
+        previous = (self.best, self.runner_up)
+        if not ranking:
+            self.best = self.runner_up = self.challenger = None
+        else:
+            leader = ranking[0][1]
+            current = next((item for item in ranking if item[1] == self.best), None)
+            if current is None:
+                # No best yet, or it stopped answering - switch at once
+                self.best, self.since, self.challenger = leader, now, None
+            elif leader != self.best:
+                margin = max(SWITCH_MARGIN_MS, current[0] * SWITCH_MARGIN_PCT / 100.0)
+                if ranking[0][0] > current[0] - margin:
+                    self.challenger = None  # Not clearly better
+                elif self.challenger is None or self.challenger[0] != leader:
+                    self.challenger = (leader, now)
+                elif now - self.challenger[1] >= SWITCH_HOLD:
+                    self.best, self.since, self.challenger = leader, now, None
+            else:
+                self.challenger = None
+            self.runner_up = next((item[1] for item in ranking if item[1] != self.best), None)
+        if (self.best, self.runner_up) != previous:
+            self.version += 1
+
+    @staticmethod
+    def _entry(item):
+        score, region, target, details = item
+        entry = {"region": region, "score": None if score == float("inf") else round(score, 3),
+                 "target": target}
+        for key, value in details.items():
+            entry[key] = round(value, 3) if isinstance(value, float) else value
+        return entry
+
+    def recommendation(self):
+        """Best region, runner-up and the full ranking as plain dicts"""
+        with self.lock:
+            ranking = self._ranking()
+            by_region = {item[1]: item for item in ranking}
+            best = by_region.get(self.best)
+            runner_up = by_region.get(self.runner_up)
+            return {
+                "best": self._entry(best) if best else None,
+                "runner_up": self._entry(runner_up) if runner_up else None,
+                "since": self.since,
+                "updated": time.time(),
+                "ranking": [self._entry(item) for item in ranking],
+            }
+
+
+def write_json(path, recommendation):
+    """Write a recommendation atomically, so readers never see half a file"""
+    temp = f"{path}.tmp"
+    try:
+        with open(temp, "w", encoding="utf-8") as f:
+            json.dump(recommendation, f, indent=2)
+        os.replace(temp, path)
+    except OSError as e:
+        print(f"Error writing {path}: {e}")
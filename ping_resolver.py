@@ -0,0 +1,144 @@
+"""
+DNS resolution cache for the CS2 Ping Monitor
+
+Hostnames are resolved once (all of them concurrently at startup), cached,
+and refreshed in the background before they expire, so probes always go
+straight to an IP and resolver latency never ends up in the measured RTT.
+
+- Keeps every A/AAAA record returned for a host
+- TTL-based expiry with refresh-ahead: a lookup past refresh_ahead * ttl
+  (or past expiry) returns the cached address immediately and refreshes it
+  in the background
+- If a refresh fails the last good addresses are kept
+- pin(host, address) forces a specific address (never refreshed)
+
+The stdlib resolver (getaddrinfo) does not expose record TTLs, so the TTL is
+a configured value rather than the one from the DNS answer.
+"""
+
+import asyncio
+import ipaddress
+import socket
+import time
+
+from ping_profiler import profiler
+
+DEFAULT_TTL = 300.0        # seconds a resolution stays valid
+DEFAULT_REFRESH_AHEAD = 0.8  # refresh in the background after this share of the TTL
+NEGATIVE_TTL = 30.0        # seconds before a failed lookup is retried
+
+
+def is_ip_address(host):
+    """True if host is an IPv4/IPv6 literal (nothing to resolve)"""
+    try:
+        ipaddress.ip_address(host.split("%")[0])
+        return True
+    except ValueError:
+        return False
+
+
+class ResolvedHost:
+    """Cached resolution of one hostname"""
+
+    __slots__ = ("host", "addresses", "resolved_at", "expires_at", "resolve_ms", "pinned", "error")
+
+    def __init__(self, host, addresses, resolve_ms, ttl, pinned=False, error=None):
+        now = time.monotonic()
+        self.host = host
+        self.addresses = addresses
+        self.resolved_at = now
+        self.expires_at = float("inf") if pinned else now + ttl
+        self.resolve_ms = resolve_ms
+        self.pinned = pinned
+        self.error = error
+
+    @property
+    def address(self):
+        """Address probes should use (first record, or the pinned one)"""
+        return self.addresses[0] if self.addresses else None
+
+
+class ResolverCache:
+    """Resolve hostnames concurrently and cache them with TTL-based expiry"""
+
+    def __init__(self, ttl=DEFAULT_TTL, refresh_ahead=DEFAULT_REFRESH_AHEAD, family=socket.AF_UNSPEC):
+        self.ttl = ttl
+        self.refresh_ahead = refresh_ahead
+        self.family = family
+        self.entries = {}     # host -> ResolvedHost
+        self._refreshing = {}  # host -> task of the lookup in flight
+        self.lookups = 0
+
+    def pin(self, host, address):
+        """Always use address for host"""
+        self.entries[host] = ResolvedHost(host, [address], 0.0, self.ttl, pinned=True)
+
+    def unpin(self, host):
+        """Drop a pinned address so host is resolved normally again"""
+        entry = self.entries.get(host)
+        if entry is not None and entry.pinned:
+            del self.entries[host]
+
+    async def _lookup(self, host):
+        """Resolve host now and store the result"""
+        loop = asyncio.get_event_loop()
+        self.lookups += 1
+        started = time.perf_counter()
+        try:
+            infos = await loop.getaddrinfo(host, None, family=self.family, type=socket.SOCK_DGRAM)
+            error = None
+        except (socket.gaierror, UnicodeError, OSError) as e:
+            infos, error = [], str(e)
+        resolve_ms = (time.perf_counter() - started) * 1000.0
+        if profiler.enabled:
+            profiler.stage("dns", resolve_ms / 1000.0)
+
+        addresses = []
+        for _, _, _, _, sockaddr in infos:
+            if sockaddr[0] not in addresses:
+                addresses.append(sockaddr[0])
+
+        current = self.entries.get(host)
+        if current is not None and current.pinned:
+            return current  # Pinned while we were resolving
+        if not addresses and current is not None and current.addresses:
+            # Keep the last good answer, retry after another TTL
+            addresses = current.addresses
+        ttl = self.ttl if addresses else min(self.ttl, NEGATIVE_TTL)
+        entry = ResolvedHost(host, addresses, resolve_ms, ttl, error=error)
+        self.entries[host] = entry
+        return entry
+
+    def _refresh(self, host):
+        """Start (or join) the lookup for host and return its task"""
+        task = self._refreshing.get(host)
+        if task is None:
+            task = asyncio.ensure_future(self._lookup(host))
+            self._refreshing[host] = task
+            task.add_done_callback(lambda _: self._refreshing.pop(host, None))
+        return task
+
+    async def resolve(self, host):
+        """Return the ResolvedHost for host, resolving only when needed"""
+        if is_ip_address(host):
+            return ResolvedHost(host, [host], 0.0, self.ttl, pinned=True)
+        entry = self.entries.get(host)
+        now = time.monotonic()
+        if entry is None or (now >= entry.expires_at and not entry.addresses):
+            return await self._refresh(host)
+        if not entry.pinned and now >= entry.resolved_at + self.ttl * self.refresh_ahead:
+            self._refresh(host)  # Serve the cached answer, refresh in the background
+        return entry
+
+    async def resolve_all(self, hosts):
+        """Resolve every hostname concurrently (IP literals are skipped)"""
+        names = {host for host in hosts if not is_ip_address(host)}
+        await asyncio.gather(*(self._refresh(host) for host in names
+                               if host not in self.entries))
+        return {host: self.entries[host] for host in names if host in self.entries}
+
+    def cancel(self):
+        """Cancel background refreshes (before the loop closes)"""
+        for task in list(self._refreshing.values()):
+            task.cancel()
+        self._refreshing.clear()
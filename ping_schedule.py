@@ -0,0 +1,219 @@
+"""
+Adaptive probe scheduling for the CS2 Ping Monitor
+
+Decides, on every engine tick, which targets are due. The engine ticks
+several times per base interval (TICKS_PER_INTERVAL), so a target's interval
+can drop below the base interval. Instead of probing everything at the same
+rate:
+
+- Volatile targets (RTT swinging, or just switched between up and down) are
+  probed at twice their base rate
+- Stable targets slow down gradually, up to STABLE_SLOWDOWN x their base interval
+- Targets that keep failing back off exponentially (2x per failure after the
+  first FAILURES_BEFORE_BACKOFF, up to MAX_BACKOFF seconds, counted from the
+  failed result); one good reply brings them straight back
+- Priority targets (servers.json "priority": true) never slow down for being
+  stable and back off at most PRIORITY_MAX_BACKOFF x their base interval
+- A global budget (probes per second) caps each tick; when more targets are
+  due than fit, priority targets go first, then the most overdue, and the
+  rest wait for the next tick
+
+RTT volatility is tracked like TCP's retransmit timer: a smoothed RTT and a
+smoothed mean deviation (RFC 6298), volatile when the deviation is a large
+share of the RTT. decisions() reports the current state of every target.
+"""
+
+import threading
+
+DEFAULT_PROBE_RATE = 200.0     # probe packets per second across all targets (a burst of N is N)
+TICKS_PER_INTERVAL = 4         # engine ticks per default base interval
+STABLE_SLOWDOWN = 4.0          # stable targets are probed at most this much less often
+STABLE_SAMPLES = 10            # replies needed before a target can count as stable
+VOLATILE_SAMPLES = 6           # ...as volatile (the srtt / 2 seed of the deviation has decayed by then)
+STABLE_RATIO = 0.05            # deviation / RTT below this is stable
+VOLATILE_RATIO = 0.15          # deviation / RTT above this is volatile
+VOLATILE_MIN_MS = 2.0          # ...and the deviation is at least this (sub-ms noise isn't)
+FAILURES_BEFORE_BACKOFF = 2    # failures tolerated at the normal rate
+MAX_BACKOFF = 60.0             # seconds between probes of a dead target at most
+PRIORITY_MAX_BACKOFF = 4.0     # priority targets back off at most this x their base interval
+RTT_GAIN = 0.125               # RFC 6298 alpha
+DEV_GAIN = 0.25                # RFC 6298 beta
+
+
+class TargetState:
+    """What the policy knows about one target"""
+
+    __slots__ = ("srtt", "rttvar", "replies", "failures", "was_up", "volatile",
+                 "interval", "next_due", "reason", "probes", "deferred")
+
+    def __init__(self):
+        self.srtt = None
+        self.rttvar = 0.0
+        self.replies = 0
+        self.failures = 0
+        self.was_up = None
+        self.volatile = False
+        self.interval = None  # None = not scheduled yet, probe at once
+        self.next_due = 0.0
+        self.reason = "new"
+        self.probes = 0
+        self.deferred = 0
+
+
+class AdaptivePolicy:
+    """Per-target probe intervals from recent results, within a global probe budget"""
+
+    def __init__(self, interval, intervals=None, priority=None, rate=DEFAULT_PROBE_RATE, adaptive=True,
+                 cost=1, tick=None):
+        self.interval = interval  # base interval of targets without their own
+        # seconds between scheduler ticks - the shortest possible interval
+        self.tick = tick if tick is not None else interval / TICKS_PER_INTERVAL
+        self.intervals = dict(intervals or {})  # target -> base interval
+        self.priority = set(priority or ())
+        self.rate = rate  # probes per second; None = unlimited
+        self.adaptive = adaptive  # False = fixed base intervals, no budget
+        self.cost = cost  # packets per probe (burst size)
+        self.states = {}
+        self.lock = threading.Lock()
+        self.ticks = 0
+        self.deferred = 0  # due probes pushed to a later tick by the budget
+
+    def configure(self, targets, intervals=None, priority=None):
+        """Apply a new target list; state is kept for targets that stay"""
+        keep = set(targets)
+        with self.lock:
+            self.intervals = dict(intervals or {})
+            self.priority = set(priority or ())
+            for target in list(self.states):
+                if target not in keep:
+                    del self.states[target]
+
+    def base_interval(self, target):
+        return max(self.intervals.get(target, self.interval), self.tick)
+
+    def interval_for(self, target):
+        """Seconds between this target's probes right now"""
+        with self.lock:
+            state = self.states.get(target)
+            if state is not None and state.interval is not None:
+                return state.interval
+        return self.base_interval(target)
+
+    def budget(self):
+        """Probes allowed per tick, or None for no limit"""
+        if not self.adaptive or self.rate is None:
+            return None
+        return max(1, int(self.rate * self.tick / self.cost))
+
+    def due(self, targets, now):
+        """Targets to probe this tick, highest priority first (up to the budget)"""
+        with self.lock:
+            self.ticks += 1
+            due = []
+            for target in targets:
+                state = self.states.get(target)
+                if state is None:
+                    state = self.states[target] = TargetState()
+                # Half a tick of slack so timer drift doesn't push a target back a whole tick
+                if state.next_due <= now + self.tick / 2:
+                    due.append((target in self.priority, now - state.next_due, target, state))
+            budget = self.budget()
+            if budget is not None and len(due) > budget:
+                due.sort(key=lambda item: (item[0], item[1]), reverse=True)
+                for _, _, _, state in due[budget:]:
+                    state.deferred += 1
+                    state.reason = "deferred"
+                self.deferred += len(due) - budget
+                due = due[:budget]
+            for _, _, target, state in due:
+                if state.interval is None:
+                    state.interval = self.base_interval(target)
+                state.next_due = now + state.interval
+                state.probes += 1
+            return [target for _, _, target, _ in due]
+
+    def reschedule(self, targets, now):
+        """Count out-of-turn probes (a refresh burst) as the targets' regular probe"""
+        with self.lock:
+            for target in targets:
+                state = self.states.get(target)
+                if state is not None:
+                    state.next_due = now + (state.interval or self.base_interval(target))
+                    state.probes += 1
+
+    def observe(self, target, value, now):
+        """Update a target's interval from a probe result (float RTT, "timeout" or "error")"""
+        with self.lock:
+            state = self.states.get(target)
+            if state is None:
+                return
+            up = isinstance(value, float)
+            flapped = state.was_up is not None and up != state.was_up
+            state.was_up = up
+            base = self.base_interval(target)
+            priority = target in self.priority
+
+            if up:
+                state.failures = 0
+                if state.srtt is None:
+                    state.srtt = value
+                    state.rttvar = value / 2
+                else:
+                    state.rttvar += DEV_GAIN * (abs(state.srtt - value) - state.rttvar)
+                    state.srtt += RTT_GAIN * (value - state.srtt)
+                state.replies += 1
+            else:
+                state.failures += 1
+
+            if not self.adaptive:
+                interval, reason = base, "fixed"
+            elif state.failures > FAILURES_BEFORE_BACKOFF:
+                limit = base * PRIORITY_MAX_BACKOFF if priority else max(MAX_BACKOFF, base)
+                interval = min(base * 2 ** (state.failures - FAILURES_BEFORE_BACKOFF), limit)
+                reason = "backoff"
+            else:
+                ratio = state.rttvar / state.srtt if state.srtt else 0.0
+                state.volatile = flapped or (up and state.replies >= VOLATILE_SAMPLES
+                                             and ratio > VOLATILE_RATIO and state.rttvar >= VOLATILE_MIN_MS)
+                if state.volatile:
+                    interval, reason = base / 2, "volatile"
+                elif priority:
+                    interval, reason = base, "priority"
+                elif up and state.replies >= STABLE_SAMPLES and ratio < STABLE_RATIO:
+                    # Slow down step by step while the target stays stable
+                    interval = min((state.interval or base) * 1.5, base * STABLE_SLOWDOWN)
+                    reason = "stable"
+                else:
+                    interval, reason = base, "normal"
+            interval = max(interval, self.tick)
+            if state.interval is not None and interval < state.interval:
+                # Speeding up: don't leave the target waiting out its old, longer interval
+                state.next_due = min(state.next_due, now + interval)
+            elif reason == "backoff":
+                # A dead target's probe takes a whole timeout - back off from its result
+                state.next_due = max(state.next_due, now + interval)
+            state.interval = interval
+            state.reason = reason
+
+    def decisions(self, now):
+        """{target: scheduling state} - why each target is probed as often as it is"""
+        with self.lock:
+            return {
+                target: {
+                    "interval": state.interval,
+                    "reason": state.reason,
+                    "next_in": max(0.0, state.next_due - now),
+                    "priority": target in self.priority,
+                    "failures": state.failures,
+                    "srtt": state.srtt,
+                    "rttvar": state.rttvar if state.srtt is not None else None,
+                    "probes": state.probes,
+                    "deferred": state.deferred,
+                }
+                for target, state in self.states.items()
+            }
+
+    def probe_rate(self):
+        """Planned packets per second with the current intervals"""
+        with self.lock:
+            return self.cost * sum(1.0 / state.interval for state in self.states.values() if state.interval)
@@ -0,0 +1,395 @@
+#!/usr/bin/env python3
+"""
+Persistent probe history for the CS2 Ping Monitor
+
+Probe results are stored in SQLite (WAL mode) by a background writer thread:
+the probe engine and the Tk thread only put a tuple on a queue, the writer
+inserts them in batches, one transaction per batch.
+
+- samples: raw results, clustered by (target, time) for fast range queries
+- rollups: 1 minute and 1 hour aggregates (count, lost, sum, min, max),
+  updated incrementally with every batch, so long time ranges are answered
+  without scanning raw rows
+- compaction: raw samples and 1 minute rollups past their retention are
+  deleted periodically and the freed pages returned to the OS
+
+Query from the command line:
+python ping_storage.py ping_history.db --target 185.40.64.1 --start "2026-10-16 18:00" --end "2026-10-16 23:00" --resolution 1m
+"""
+
+import argparse
+import os
+import queue
+import sqlite3
+import sys
+import threading
+import time
+from datetime import datetime
+
+ROLLUP_RESOLUTIONS = {"1m": 60, "1h": 3600}
+
+DEFAULT_BATCH_SIZE = 500        # rows per transaction at most
+DEFAULT_FLUSH_INTERVAL = 1.0    # seconds a sample may wait before it is written
+DEFAULT_COMPACT_INTERVAL = 3600.0
+DEFAULT_MAX_QUEUED = 100000     # samples waiting for the writer at most - later ones are dropped
+MIN_BURST_STEP = 0.001          # seconds between a burst's samples at least (timestamps must differ)
+RAW_RETENTION = 7 * 86400       # seconds raw samples are kept
+MINUTE_RETENTION = 90 * 86400   # seconds 1 minute rollups are kept (1 hour rollups: forever)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS targets (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS samples (
+    target_id INTEGER NOT NULL,
+    ts REAL NOT NULL,
+    rtt REAL,
+    PRIMARY KEY (target_id, ts)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS samples_ts ON samples (ts);
+CREATE TABLE IF NOT EXISTS rollups (
+    resolution INTEGER NOT NULL,
+    target_id INTEGER NOT NULL,
+    bucket INTEGER NOT NULL,
+    count INTEGER NOT NULL,
+    lost INTEGER NOT NULL,
+    rtt_sum REAL NOT NULL,
+    rtt_min REAL,
+    rtt_max REAL,
+    PRIMARY KEY (resolution, target_id, bucket)
+) WITHOUT ROWID;
+"""
+
+SAMPLE_INSERT = "INSERT OR IGNORE INTO samples (target_id, ts, rtt) VALUES (?, ?, ?)"
+
+ROLLUP_UPSERT = """
+INSERT INTO rollups (resolution, target_id, bucket, count, lost, rtt_sum, rtt_min, rtt_max)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (resolution, target_id, bucket) DO UPDATE SET
+    count = count + excluded.count,
+    lost = lost + excluded.lost,
+    rtt_sum = rtt_sum + excluded.rtt_sum,
+    rtt_min = CASE WHEN rtt_min IS NULL OR excluded.rtt_min < rtt_min THEN excluded.rtt_min ELSE rtt_min END,
+    rtt_max = CASE WHEN rtt_max IS NULL OR excluded.rtt_max > rtt_max THEN excluded.rtt_max ELSE rtt_max END
+"""
+
+
+def connect(path):
+    """Open the database in WAL mode and make sure the schema exists"""
+    conn = sqlite3.connect(path, timeout=10)
+    if conn.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:
+        # Incremental auto-vacuum lets compaction hand pages back without a full VACUUM
+        conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+        conn.execute("VACUUM")
+    conn.execute("PRAGMA journal_mode = WAL")
+    conn.execute("PRAGMA synchronous = NORMAL")  # Safe with WAL, far fewer fsyncs
+    conn.executescript(SCHEMA)
+    return conn
+
+
+class StorageWriter:
+    """Background thread that writes probe results to SQLite in batches"""
+
+    def __init__(self, path, batch_size=DEFAULT_BATCH_SIZE, flush_interval=DEFAULT_FLUSH_INTERVAL,
+                 compact_interval=DEFAULT_COMPACT_INTERVAL, max_queued=DEFAULT_MAX_QUEUED):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.compact_interval = compact_interval
+        self.queue = queue.Queue(max_queued)
+        self.written = 0
+        self.batches = 0
+        self.errors = 0
+        self.dropped = 0      # samples not queued: the writer fell behind or couldn't open the database
+        self.duplicates = 0   # samples whose (target, ts) was already stored
+        self.failed = False   # the database couldn't be opened - record() drops everything
+        self.last_compaction = None
+        self._target_ids = {}
+        self._stop = object()
+        self.thread = threading.Thread(target=self._run, name="storage-writer", daemon=True)
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def record(self, result, timestamp, spacing=0.0):
+        """Queue a ProbeResult for writing - never blocks on the database
+
+        Every probe of a burst is its own sample (None if lost), spacing
+        seconds apart in send order and ending at timestamp, so loss and
+        min/max in the history count probes, not bursts.
+        """
+        if result.burst is not None:
+            rtts = result.burst["rtts"]
+            step = max(spacing, MIN_BURST_STEP)
+            for index, rtt in enumerate(rtts):
+                self._put((result.target, timestamp - (len(rtts) - 1 - index) * step, rtt))
+            return
+        rtt = result.value if isinstance(result.value, float) else None
+        self._put((result.target, timestamp, rtt))
+
+    def record_sample(self, target, timestamp, rtt):
+        """Queue a raw sample (rtt in ms, None if lost)"""
+        self._put((target, timestamp, rtt))
+
+    def _put(self, item):
+        if self.failed:
+            self.dropped += 1
+            return
+        try:
+            self.queue.put_nowait(item)
+        except queue.Full:
+            if not self.dropped:
+                print(f"Error writing ping history: more than {self.queue.maxsize} samples waiting, dropping new ones")
+            self.dropped += 1
+
+    def stop(self, timeout=None):
+        """Flush what is queued and stop the writer"""
+        if self.thread.is_alive():
+            self.queue.put(self._stop)
+            self.thread.join(timeout)
+
+    def _run(self):
+        try:
+            conn = connect(self.path)
+        except (sqlite3.Error, OSError) as e:
+            self.failed = True
+            print(f"Error opening ping history {self.path}: {e} - history is not saved")
+            # Free what was queued before the failure
+            while True:
+                try:
+                    self.queue.get_nowait()
+                except queue.Empty:
+                    break
+                self.dropped += 1
+            return
+        next_compaction = time.monotonic() + self.compact_interval
+        stopping = False
+        try:
+            while not stopping:
+                batch = []
+                deadline = None
+                # Collect until the batch is full or the oldest row has waited long enough
+                while len(batch) < self.batch_size:
+                    wait = self.flush_interval if deadline is None else deadline - time.monotonic()
+                    if wait <= 0:
+                        break
+                    try:
+                        item = self.queue.get(timeout=wait)
+                    except queue.Empty:
+                        break
+                    if item is self._stop:
+                        stopping = True
+                        break
+                    batch.append(item)
+                    if deadline is None:
+                        deadline = time.monotonic() + self.flush_interval
+                if batch:
+                    self._write(conn, batch)
+                if time.monotonic() >= next_compaction:
+                    self.compact(conn)
+                    next_compaction = time.monotonic() + self.compact_interval
+        finally:
+            conn.close()
+
+    def _target_id(self, conn, name):
+        target_id = self._target_ids.get(name)
+        if target_id is None:
+            conn.execute("INSERT OR IGNORE INTO targets (name) VALUES (?)", (name,))
+            target_id = conn.execute("SELECT id FROM targets WHERE name = ?", (name,)).fetchone()[0]
+            self._target_ids[name] = target_id
+        return target_id
+
+    def _write(self, conn, batch):
+        """Insert one batch and fold it into the rollups, in a single transaction"""
+        try:
+            with conn:
+                inserted = 0
+                rollups = {}
+                for name, ts, rtt in batch:
+                    target_id = self._target_id(conn, name)
+                    # A sample already stored must not be folded into the rollups twice
+                    if not conn.execute(SAMPLE_INSERT, (target_id, ts, rtt)).rowcount:
+                        continue
+                    inserted += 1
+                    for seconds in ROLLUP_RESOLUTIONS.values():
+                        key = (seconds, target_id, int(ts // seconds) * seconds)
+                        agg = rollups.get(key)
+                        if agg is None:
+                            agg = rollups[key] = [0, 0, 0.0, None, None]
+                        agg[0] += 1
+                        if rtt is None:
+                            agg[1] += 1
+                        else:
+                            agg[2] += rtt
+                            agg[3] = rtt if agg[3] is None else min(agg[3], rtt)
+                            agg[4] = rtt if agg[4] is None else max(agg[4], rtt)
+                conn.executemany(ROLLUP_UPSERT, [key + tuple(agg) for key, agg in rollups.items()])
+            self.written += inserted
+            self.duplicates += len(batch) - inserted
+            self.batches += 1
+        except sqlite3.Error as e:
+            self.errors += 1
+            self._target_ids.clear()  # Ids inserted by the rolled-back batch are gone
+            print(f"Error writing ping history: {e}")
+
+    def compact(self, conn, now=None):
+        """Drop data past its retention and give the space back"""
+        now = time.time() if now is None else now
+        try:
+            with conn:
+                conn.execute("DELETE FROM samples WHERE ts < ?", (now - RAW_RETENTION,))
+                conn.execute("DELETE FROM rollups WHERE resolution = ? AND bucket < ?",
+                             (ROLLUP_RESOLUTIONS["1m"], now - MINUTE_RETENTION))
+            conn.execute("PRAGMA incremental_vacuum")
+            conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            self.last_compaction = now
+        except sqlite3.Error as e:
+            print(f"Error compacting ping history: {e}")
+
+
+class PingStorage:
+    """Read side: time-range, per-target and rollup queries (one per thread)"""
+
+    def __init__(self, path):
+        self.conn = connect(path)
+
+    def close(self):
+        self.conn.close()
+
+    def targets(self):
+        return [row[0] for row in self.conn.execute("SELECT name FROM targets ORDER BY name")]
+
+    def samples(self, target, start, end):
+        """Raw (ts, rtt) rows of one target in [start, end)"""
+        return self.conn.execute(
+            "SELECT s.ts, s.rtt FROM samples s JOIN targets t ON t.id = s.target_id "
+            "WHERE t.name = ? AND s.ts >= ? AND s.ts < ? ORDER BY s.ts",
+            (target, start, end)
+        ).fetchall()
+
+    def range(self, start, end):
+        """Raw (target, ts, rtt) rows of every target in [start, end)"""
+        return self.conn.execute(
+            "SELECT t.name, s.ts, s.rtt FROM samples s JOIN targets t ON t.id = s.target_id "
+            "WHERE s.ts >= ? AND s.ts < ? ORDER BY s.ts",
+            (start, end)
+        ).fetchall()
+
+    def _raw_aggregate(self, target, start, end):
+        """(count, lost, rtt_sum, min, max) of the raw samples of one target in [start, end)"""
+        return self.conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(s.rtt IS NULL), 0), COALESCE(SUM(s.rtt), 0.0), MIN(s.rtt), MAX(s.rtt) "
+            "FROM samples s JOIN targets t ON t.id = s.target_id "
+            "WHERE t.name = ? AND s.ts >= ? AND s.ts < ?",
+            (target, start, end)
+        ).fetchone()
+
+    def rollup(self, target, resolution, start, end):
+        """Aggregates of one target: (bucket, count, lost, avg, min, max) per 1m/1h bucket
+
+        Only samples in [start, end) are counted: whole buckets come from the
+        rollups, a bucket cut by start or end from the raw samples (so an edge
+        older than RAW_RETENTION counts what is left of them - nothing).
+        """
+        seconds = ROLLUP_RESOLUTIONS[resolution]
+        first_whole = -(-int(start) // seconds) * seconds
+        if first_whole < start:
+            first_whole += seconds  # start had a fraction of a second past a bucket start
+        last_whole = max(int(end // seconds) * seconds, first_whole)
+        rows = []
+        if start < first_whole:
+            rows.append((int(start // seconds) * seconds,) + self._raw_aggregate(target, start, min(first_whole, end)))
+        if first_whole < last_whole:
+            rows.extend(self.conn.execute(
+                "SELECT r.bucket, r.count, r.lost, r.rtt_sum, r.rtt_min, r.rtt_max "
+                "FROM rollups r JOIN targets t ON t.id = r.target_id "
+                "WHERE r.resolution = ? AND t.name = ? AND r.bucket >= ? AND r.bucket < ? "
+                "ORDER BY r.bucket",
+                (seconds, target, first_whole, last_whole)
+            ).fetchall())
+        if first_whole <= last_whole < end:
+            rows.append((last_whole,) + self._raw_aggregate(target, last_whole, end))
+        result = []
+        for bucket, count, lost, rtt_sum, rtt_min, rtt_max in rows:
+            if not count:
+                continue
+            received = count - lost
+            avg = rtt_sum / received if received else None
+            result.append((bucket, count, lost, avg, rtt_min, rtt_max))
+        return result
+
+    def summary(self, target, start, end):
+        """(count, lost, avg, min, max) of one target over [start, end) from the rollups"""
+        # Whole hours come from the 1h rollups, the ragged edges from the 1m rollups
+        # (and the raw samples for minutes cut by start or end)
+        count = lost = 0
+        total = 0.0
+        low = high = None
+        first_hour = -(-int(start) // 3600) * 3600
+        last_hour = int(end) // 3600 * 3600
+        spans = [("1m", start, end)]
+        if first_hour < last_hour:
+            spans = [("1m", start, first_hour), ("1h", first_hour, last_hour), ("1m", last_hour, end)]
+        for resolution, span_start, span_end in spans:
+            for _, n, n_lost, avg, rtt_min, rtt_max in self.rollup(target, resolution, span_start, span_end):
+                count += n
+                lost += n_lost
+                if avg is not None:
+                    total += avg * (n - n_lost)
+                    low = rtt_min if low is None else min(low, rtt_min)
+                    high = rtt_max if high is None else max(high, rtt_max)
+        received = count - lost
+        return count, lost, (total / received if received else None), low, high
+
+
+def parse_time(text):
+    """Unix seconds from a number or an ISO date/time (local time)"""
+    try:
+        return float(text)
+    except ValueError:
+        return datetime.fromisoformat(text).timestamp()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Query the CS2 Ping Monitor history database")
+    parser.add_argument("database")
+    parser.add_argument("--target", help="target to query (omit to list targets)")
+    parser.add_argument("--start", default=None, help="ISO time or unix seconds (default: 24h ago)")
+    parser.add_argument("--end", default=None, help="ISO time or unix seconds (default: now)")
+    parser.add_argument("--resolution", choices=["raw", "1m", "1h", "summary"], default="summary")
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(args.database):
+        parser.error(f"no such database: {args.database}")
+    storage = PingStorage(args.database)
+    try:
+        if args.target is None:
+            print("\n".join(storage.targets()))
+            return 0
+        end = parse_time(args.end) if args.end else time.time()
+        start = parse_time(args.start) if args.start else end - 86400
+
+        def fmt(value):
+            return "-" if value is None else f"{value:.1f}"
+
+        if args.resolution == "raw":
+            for ts, rtt in storage.samples(args.target, start, end):
+                print(f"{datetime.fromtimestamp(ts).isoformat(' ', 'seconds')}  {fmt(rtt)}")
+        elif args.resolution == "summary":
+            count, lost, avg, low, high = storage.summary(args.target, start, end)
+            loss = 100.0 * lost / count if count else 0.0
+            print(f"{args.target}: {count} samples, {loss:.1f}% loss, "
+                  f"avg {fmt(avg)}ms, min {fmt(low)}ms, max {fmt(high)}ms")
+        else:
+            for bucket, count, lost, avg, low, high in storage.rollup(args.target, args.resolution, start, end):
+                print(f"{datetime.fromtimestamp(bucket).isoformat(' ', 'minutes')}  "
+                      f"n={count:<5} lost={lost:<4} avg={fmt(avg)} min={fmt(low)} max={fmt(high)}")
+    finally:
+        storage.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
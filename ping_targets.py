@@ -0,0 +1,320 @@
+"""
+Target registry for the CS2 Ping Monitor
+
+Targets are loaded from servers.json (next to the application) and shared by
+the Tk window and the headless mode. Each entry has a category, a label, an
+address, a probe method (icmp, tcp, udp or a2s - see ping_probers.py), an
+optional port, an optional probe interval, an optional priority flag
+(priority targets are kept at their full probe rate, see ping_schedule.py), an
+optional region (servers with a region are ranked by ping_recommend.py) and an
+optional alert_rtt_ms (RTT alert threshold, see ping_events.py; the top-level
+"alerts" object sets the defaults) and an optional resolve_to (an IP a hostname
+entry is always probed at, instead of looking it up - see ping_resolver.py).
+
+An optional top-level "sources" list probes every target once per source -
+a local address, or on Linux an interface name, with "default" for the
+default route - so several uplinks or a VPN can be compared side by side
+(see ping_probers.py):
+
+{
+  "alerts": {"rtt_ms": 100, "loss_pct": 5},
+  "sources": ["default", "192.168.2.20", "wg0"],
+  "categories": [
+    {"name": "🔫 Counter-Strike 2 (Official)", "targets": [
+      {"label": "CS2 Paris, France", "address": "185.25.182.1", "region": "Paris", "priority": true},
+      {"label": "CS2 Paris (A2S)", "address": "185.25.182.1", "method": "a2s", "port": 27015,
+       "alert_rtt_ms": 60},
+      {"label": "Google", "address": "google.com", "interval": 5},
+      {"label": "Steam EU 1", "address": "eu1.steamcontent.com", "resolve_to": "155.133.248.34"}
+    ]}
+  ]
+}
+
+Each source's copy of a target is an engine target of its own ("spec@source"),
+with its own history, alerts and schedule. Entries that point at the same
+endpoint share one probe: identical entries are merged here, and the engine also merges targets that resolve to the same
+address. The file is polled for changes, so targets can be added or removed
+while the monitor runs. Without a servers.json the built-in list below is used.
+"""
+
+import json
+import os
+import sys
+from collections import OrderedDict
+
+from ping_events import AlertThresholds
+from ping_probers import DEFAULT_PORTS, PROBE_METHODS
+from ping_resolver import is_ip_address
+
+CONFIG_FILE = "servers.json"
+DEFAULT_SOURCE = "default"  # the "sources" entry for the default route
+
+# Built-in list, used when there is no servers.json: (label, address[, region])
+DEFAULT_CATEGORIES = [
+    ("🌐 General Servers", [
+        ("Google", "google.com"),
+        ("Cloudflare", "cloudflare.com"),
+        ("YouTube", "youtube.com"),
+        ("Twitch", "twitch.tv"),
+        ("GitHub", "github.com"),
+        ("Stack Overflow", "stackoverflow.com"),
+        ("Discord", "discord.com"),
+        ("Steam Community", "steamcommunity.com"),
+    ]),
+    ("🔫 Counter-Strike 2 (Official)", [
+        ("CS2 Stockholm, Sweden", "146.66.152.1", "Stockholm"),
+        ("CS2 Luxembourg, EU West", "155.133.232.1", "Luxembourg"),
+        ("CS2 Vienna, Austria", "155.133.248.1", "Vienna"),
+        ("CS2 Paris, France", "185.25.182.1", "Paris"),
+        ("CS2 Frankfurt, Germany", "185.40.64.1", "Frankfurt"),
+        ("CS2 London, UK", "185.93.2.1", "London"),
+        ("CS2 Madrid, Spain", "146.66.155.1", "Madrid"),
+        ("CS2 Stockholm, Sweden (Backup)", "146.66.158.1", "Stockholm"),
+        ("CS2 Luxembourg (Backup)", "155.133.226.1", "Luxembourg"),
+        ("CS2 Vienna (Backup)", "155.133.242.1", "Vienna"),
+        ("CS2 Paris (Backup)", "185.25.176.1", "Paris"),
+        ("CS2 Frankfurt (Backup)", "185.40.65.1", "Frankfurt"),
+        ("CS2 London (Backup)", "185.93.3.1", "London"),
+    ]),
+    ("🚂 Steam Content Servers (EU)", [
+        (f"Steam EU {i}", f"eu{i}.steamcontent.com") for i in range(1, 9)
+    ]),
+    ("🔧 DNS & Infrastructure", [
+        ("Google DNS", "8.8.8.8"),
+        ("Cloudflare DNS", "1.1.1.1"),
+        ("France DNS", "185.25.182.1"),
+        ("Germany DNS", "185.40.64.1"),
+        ("UK DNS", "185.93.2.1"),
+    ]),
+]
+
+
+def app_dir():
+    """Folder of the scripts, or of the executable when built with PyInstaller"""
+    if getattr(sys, 'frozen', False):
+        return os.path.dirname(sys.executable)
+    return os.path.dirname(os.path.abspath(__file__))
+
+
+def target_spec(address, method="icmp", port=None):
+    """Engine target string for an endpoint (see ping_probers.parse_target)"""
+    if method == "icmp":
+        return address
+    host = f"[{address}]" if ":" in address else address
+    return f"{method}://{host}:{port or DEFAULT_PORTS[method]}"
+
+
+def sourced_spec(spec, source):
+    """Engine target string for probing spec from a source (see ping_probers.split_source)"""
+    if source is None or source == DEFAULT_SOURCE:
+        return spec
+    return f"{spec}@{source}"
+
+
+def parse_sources(sources):
+    """Validate a "sources" list; returns it as a list of strings"""
+    if not isinstance(sources, list) or not all(isinstance(source, str) and source for source in sources):
+        raise ValueError(f"\"sources\" must be a list of addresses or interface names, not {sources!r}")
+    return list(OrderedDict.fromkeys(sources))
+
+
+class TargetEntry:
+    """One row of the target list"""
+
+    __slots__ = ("category", "label", "address", "method", "port", "interval", "priority",
+                 "region", "alert_rtt", "resolve_to", "spec")
+
+    def __init__(self, category, label, address, method="icmp", port=None, interval=None,
+                 priority=False, region=None, alert_rtt=None, resolve_to=None):
+        if method not in PROBE_METHODS:
+            raise ValueError(f"unknown probe method {method!r} for {address}")
+        if resolve_to is not None and (is_ip_address(address) or not is_ip_address(resolve_to)):
+            raise ValueError(f"resolve_to needs a hostname address and an IP, got {address} -> {resolve_to!r}")
+        self.category = category
+        self.label = label or address
+        self.address = address
+        self.method = method
+        self.port = port
+        self.interval = interval
+        self.priority = priority
+        self.region = region
+        self.alert_rtt = alert_rtt
+        self.resolve_to = resolve_to
+        self.spec = target_spec(address, method, port)
+
+
+def parse_config(data):
+    """Build TargetEntries from the decoded servers.json"""
+    entries = []
+    for category in data.get("categories", []):
+        name = category["name"]
+        for item in category.get("targets", []):
+            interval = item.get("interval")
+            alert_rtt = item.get("alert_rtt_ms")
+            entries.append(TargetEntry(
+                name,
+                item.get("label"),
+                item["address"],
+                item.get("method", "icmp"),
+                item.get("port"),
+                float(interval) if interval is not None else None,
+                bool(item.get("priority", False)),
+                item.get("region"),
+                float(alert_rtt) if alert_rtt is not None else None,
+                item.get("resolve_to"),
+            ))
+    return entries
+
+
+def default_entries():
+    return [TargetEntry(category, target[0], target[1], region=target[2] if len(target) > 2 else None)
+            for category, targets in DEFAULT_CATEGORIES for target in targets]
+
+
+def default_config():
+    """The built-in list in servers.json form"""
+    categories = []
+    for category, targets in DEFAULT_CATEGORIES:
+        items = []
+        for target in targets:
+            item = {"label": target[0], "address": target[1]}
+            if len(target) > 2:
+                item["region"] = target[2]
+            items.append(item)
+        categories.append({"name": category, "targets": items})
+    return {"categories": categories}
+
+
+class TargetRegistry:
+    """Targets from servers.json, de-duplicated by endpoint, reloaded when the file changes
+
+    sources, if given, replaces the file's "sources" list (e.g. from the command line).
+    """
+
+    def __init__(self, path=None, sources=None):
+        self.path = path if path is not None else os.path.join(app_dir(), CONFIG_FILE)
+        self.entries = []
+        self.alert_settings = {}  # the file's "alerts" object
+        self.source_override = parse_sources(sources) if sources else None
+        self.sources = self.source_override or []  # empty = default route only
+        self.mtime = None
+        self.error = None
+        self.load()
+
+    def _read(self):
+        if not os.path.exists(self.path):
+            return default_entries(), {}, [], None
+        mtime = os.path.getmtime(self.path)
+        with open(self.path, encoding="utf-8") as f:
+            data = json.load(f)
+        AlertThresholds.from_config(data.get("alerts"))  # Fail the load on bad values
+        sources = parse_sources(data["sources"]) if "sources" in data else []
+        return parse_config(data), data.get("alerts") or {}, sources, mtime
+
+    def load(self):
+        """(Re)load the file; on a broken file the previous targets are kept"""
+        try:
+            self.entries, self.alert_settings, sources, self.mtime = self._read()
+            self.sources = self.source_override or sources
+            self.error = None
+            return True
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            self.error = f"{self.path}: {e}"
+            print(f"Error loading targets from {self.error}")
+            if not self.entries:
+                self.entries = default_entries()
+            return False
+
+    def poll(self):
+        """Reload if the file changed; return (added, removed) target specs or None"""
+        try:
+            mtime = os.path.getmtime(self.path) if os.path.exists(self.path) else None
+        except OSError:
+            return None
+        if mtime == self.mtime:
+            return None
+        before = set(self.targets())
+        if not self.load():
+            self.mtime = mtime  # Don't retry the broken file until it changes again
+            return None
+        after = set(self.targets())
+        return sorted(after - before), sorted(before - after)
+
+    def paths(self, spec):
+        """Engine targets for one list row: the spec once per source"""
+        if not self.sources:
+            return [spec]
+        return [sourced_spec(spec, source) for source in self.sources]
+
+    def expand(self, specs):
+        """Engine targets for several list rows (e.g. to refresh them)"""
+        return list(OrderedDict.fromkeys(path for spec in specs for path in self.paths(spec)))
+
+    def targets(self):
+        """Unique target specs in list order - each endpoint is probed once per source"""
+        return self.expand(entry.spec for entry in self.entries)
+
+    def intervals(self):
+        """{spec: seconds} for targets with their own interval (shortest wins)"""
+        intervals = {}
+        for entry in self.entries:
+            if entry.interval is not None:
+                for path in self.paths(entry.spec):
+                    intervals[path] = min(entry.interval, intervals.get(path, entry.interval))
+        return intervals
+
+    def priority(self):
+        """Target specs flagged as priority by any of their entries"""
+        return {path for entry in self.entries if entry.priority for path in self.paths(entry.spec)}
+
+    def regions(self):
+        """{spec: region} for targets that belong to a CS2 region - every source's path competes"""
+        regions = {}
+        for entry in self.entries:
+            if entry.region:
+                for path in self.paths(entry.spec):
+                    regions.setdefault(path, entry.region)
+        return regions
+
+    def alerts(self, overrides=None):
+        """AlertThresholds from the "alerts" object and per-target alert_rtt_ms (lowest wins)
+
+        overrides replaces keys of the "alerts" object, e.g. from the command line.
+        """
+        per_target = {}
+        for entry in self.entries:
+            if entry.alert_rtt is not None:
+                for path in self.paths(entry.spec):
+                    per_target[path] = min(entry.alert_rtt, per_target.get(path, entry.alert_rtt))
+        return AlertThresholds.from_config(dict(self.alert_settings, **(overrides or {})), per_target)
+
+    def pins(self):
+        """{hostname: address} from resolve_to (the first entry for a hostname wins)"""
+        pins = {}
+        for entry in self.entries:
+            if entry.resolve_to is not None:
+                pins.setdefault(entry.address, entry.resolve_to)
+        return pins
+
+    def categories(self):
+        """{category: [(spec, label)]} in file order, duplicates kept for every view
+
+        One row per endpoint: the window shows its sources side by side in the row.
+        """
+        categories = OrderedDict()
+        for entry in self.entries:
+            categories.setdefault(entry.category, []).append((entry.spec, entry.label))
+        return categories
+
+    def labels(self):
+        """{spec: label} - the first label given for each endpoint (and "label via source")"""
+        labels = {}
+        for entry in self.entries:
+            labels.setdefault(entry.spec, entry.label)
+            for source in self.sources:
+                labels.setdefault(sourced_spec(entry.spec, source), f"{entry.label} via {source}")
+        return labels
+
+
+# Flat list of the built-in targets, de-duplicated
+SERVERS = list(OrderedDict.fromkeys(entry.spec for entry in default_entries()))
@@ -0,0 +1,48 @@
+"""
+Alert state machines for targets that never answer, and ones that stop answering
+
+Usage:
+python -m pytest tests
+"""
+
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ping_engine import ProbeResult
+from ping_events import LOSS_WINDOW, ChangeDetector, EventStream
+
+
+def result(target, value):
+    return ProbeResult(target, value, 0.0, 0.001, "icmp", target, 0.0)
+
+
+class ChangeDetectorTest(unittest.TestCase):
+    def setUp(self):
+        self.detector = ChangeDetector(stream=EventStream())  # Nobody subscribed - nothing delivered
+
+    def observe(self, target, values):
+        events = []
+        for index, value in enumerate(values):
+            events += self.detector.observe(result(target, value), float(index))
+        return [event.kind for event in events]
+
+    def test_never_answering_target_is_silent(self):
+        # e.g. a relay that blocks ICMP: no down and no loss spike, however long it runs
+        self.assertEqual(self.observe("162.254.197.36", ["timeout"] * (LOSS_WINDOW * 3)), [])
+
+    def test_answering_target_reports_down_and_loss(self):
+        kinds = self.observe("185.25.182.1", [20.0] * LOSS_WINDOW + ["timeout"] * LOSS_WINDOW)
+        self.assertIn("down", kinds)
+        self.assertIn("loss_spike", kinds)
+
+    def test_loss_counts_from_the_first_reply(self):
+        # Timeouts before the target ever answered don't make its first reply a spike
+        kinds = self.observe("185.25.182.2", ["timeout"] * LOSS_WINDOW + [20.0] * LOSS_WINDOW)
+        self.assertEqual(kinds, ["up"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,116 @@
+"""
+Scrapes of the /metrics endpoint of a MonitorCore probing loopback listeners
+
+Usage:
+python -m pytest tests
+"""
+
+import os
+import queue
+import re
+import socket
+import sys
+import time
+import unittest
+import urllib.error
+import urllib.request
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ping_engine import MonitorCore
+from ping_exporter import OPENMETRICS_TYPE, PROMETHEUS_TYPE, MetricsServer
+from test_probers import UdpEcho
+
+SAMPLE = re.compile(r'^([a-zA-Z_:][a-zA-Z0-9_:]*)(\{[^}]*\})? (\S+)$')
+SUFFIXES = {"counter": ("_total",), "gauge": ("",), "histogram": ("_bucket", "_sum", "_count")}
+
+
+def scrape(port, accept=None):
+    request = urllib.request.Request(f"http://127.0.0.1:{port}/metrics")
+    if accept:
+        request.add_header("Accept", accept)
+    with urllib.request.urlopen(request, timeout=5) as response:
+        return response.headers["Content-Type"], response.read().decode("utf-8")
+
+
+class MetricsServerTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.echo = UdpEcho()
+        cls.silent = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        cls.silent.bind(("127.0.0.1", 0))
+        cls.targets = [f"udp://127.0.0.1:{cls.echo.port}", f"udp://127.0.0.1:{cls.silent.getsockname()[1]}"]
+        cls.monitor = MonitorCore(cls.targets, interval=0.2, timeout=0.2, jitter=0.0)
+        cls.server = MetricsServer(cls.monitor, 0).start()
+        cls.monitor.start()
+        # Wait until both targets have reported at least once
+        seen = set()
+        deadline = time.monotonic() + 5
+        while seen != set(cls.targets) and time.monotonic() < deadline:
+            try:
+                seen.add(cls.monitor.results.get(timeout=0.5).target)
+            except queue.Empty:
+                pass
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.stop()
+        cls.monitor.stop(timeout=2)
+        cls.silent.close()
+        cls.echo.close()
+
+    def test_openmetrics_exposition(self):
+        content_type, body = scrape(self.server.port, "application/openmetrics-text; version=1.0.0")
+        self.assertEqual(content_type, OPENMETRICS_TYPE)
+        self.assertTrue(body.endswith("\n# EOF\n"))
+        lines = body.splitlines()
+        self.assertEqual(lines.count("# EOF"), 1)
+
+        families = {}
+        family = None
+        samples = []
+        for line in lines[:-1]:
+            if line.startswith("# HELP "):
+                family = line.split(" ")[2]
+                self.assertNotIn(family, families, f"{family} declared twice")
+            elif line.startswith("# TYPE "):
+                _, _, name, kind = line.split(" ")
+                self.assertEqual(name, family, "TYPE must follow the HELP of its family")
+                self.assertIn(kind, SUFFIXES)
+                families[name] = kind
+            else:
+                match = SAMPLE.match(line)
+                self.assertIsNotNone(match, f"bad sample line: {line!r}")
+                name, labels, value = match.groups()
+                self.assertIn(family, families, f"{name} has no TYPE")
+                self.assertIn(name, [family + suffix for suffix in SUFFIXES[families[family]]])
+                float(value)
+                samples.append((name, labels or "", value))
+
+        for target in self.targets:
+            self.assertTrue(any(f'target="{target}"' in labels for _, labels, _ in samples))
+        up = {labels: value for name, labels, value in samples if name == "cs2ping_up"}
+        self.assertIn("1", up.values())
+        self.assertIn("0", up.values())
+        # The +Inf bucket of every histogram holds all its observations
+        counts = {(name[:-len("_count")], labels): value for name, labels, value in samples if name.endswith("_count")}
+        for name, labels, value in samples:
+            if name.endswith("_bucket") and 'le="+Inf"' in labels:
+                key = (name[:-len("_bucket")], labels.replace(',le="+Inf"', ""))
+                self.assertEqual(value, counts[key])
+
+    def test_prometheus_text_by_default(self):
+        content_type, body = scrape(self.server.port)
+        self.assertEqual(content_type, PROMETHEUS_TYPE)
+        self.assertNotIn("# EOF", body)
+        self.assertIn("# TYPE cs2ping_probes_total counter", body)
+
+    def test_unknown_path_is_404(self):
+        with self.assertRaises(urllib.error.HTTPError) as error:
+            urllib.request.urlopen(f"http://127.0.0.1:{self.server.port}/other", timeout=5)
+        self.assertEqual(error.exception.code, 404)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,135 @@
+"""
+Round trips of the TCP and UDP probers against listeners on 127.0.0.1
+
+Usage:
+python -m pytest tests
+"""
+
+import asyncio
+import os
+import socket
+import sys
+import threading
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ping_probers import PAYLOAD, MultiProber, TcpProber, UdpProber, summarize_burst
+
+TIMEOUT = 1.0
+
+
+class UdpEcho:
+    """Echoes every datagram back to its sender, on a daemon thread; peers lists the senders"""
+
+    def __init__(self, host="127.0.0.1"):
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.bind((host, 0))
+        self.sock.settimeout(0.1)
+        self.port = self.sock.getsockname()[1]
+        self.peers = []
+        self.running = True
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def _run(self):
+        while self.running:
+            try:
+                data, source = self.sock.recvfrom(2048)
+                self.peers.append(source[0])
+                self.sock.sendto(data, source)
+            except socket.timeout:
+                continue
+            except OSError:
+                break
+
+    def close(self):
+        self.running = False
+        self.thread.join()
+        self.sock.close()
+
+
+def probe(prober, target, timeout=TIMEOUT):
+    async def run():
+        prober.open()
+        try:
+            return await prober.probe(target, timeout)
+        finally:
+            prober.close()
+    return asyncio.run(run())
+
+
+class TcpProberTest(unittest.TestCase):
+    def test_connect_to_listener(self):
+        listener = socket.create_server(("127.0.0.1", 0))
+        try:
+            rtt = probe(TcpProber(listener.getsockname()[1]), "127.0.0.1")
+        finally:
+            listener.close()
+        self.assertIsInstance(rtt, float)
+        self.assertGreaterEqual(rtt, 0.0)
+
+    def test_refused_port_counts_as_answer(self):
+        # The RST proves the host is up, so it is timed like a handshake
+        listener = socket.create_server(("127.0.0.1", 0))
+        port = listener.getsockname()[1]
+        listener.close()
+        self.assertIsInstance(probe(TcpProber(port), "127.0.0.1"), float)
+
+
+class UdpProberTest(unittest.TestCase):
+    def setUp(self):
+        self.echo = UdpEcho()
+
+    def tearDown(self):
+        self.echo.close()
+
+    def test_round_trip(self):
+        rtt = probe(UdpProber(self.echo.port, payload=PAYLOAD), "127.0.0.1")
+        self.assertIsInstance(rtt, float)
+        self.assertGreaterEqual(rtt, 0.0)
+
+    def test_silent_port_is_lost(self):
+        silent = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        silent.bind(("127.0.0.1", 0))
+        try:
+            result = probe(UdpProber(silent.getsockname()[1], payload=PAYLOAD), "127.0.0.1", 0.2)
+        finally:
+            silent.close()
+        self.assertNotIsInstance(result, float)
+
+    def test_burst_matches_every_reply(self):
+        prober = UdpProber(self.echo.port, payload=PAYLOAD)
+
+        async def run():
+            prober.open()
+            try:
+                return await prober.burst("127.0.0.1", 5, 0.01, TIMEOUT)
+            finally:
+                prober.close()
+
+        rtts, order = asyncio.run(run())
+        self.assertEqual(len(rtts), 5)
+        self.assertTrue(all(isinstance(rtt, float) for rtt in rtts))
+        self.assertEqual(sorted(order), list(range(5)))
+        self.assertIsNotNone(summarize_burst(rtts, order))
+
+    def test_multiprober_routes_udp_spec(self):
+        # Backends are opened on the engine loop, so route inside it
+        target = f"udp://127.0.0.1:{self.echo.port}"
+        prober = MultiProber()
+
+        async def run():
+            prober.open()
+            try:
+                return prober.method_for(target), await prober.probe(target, TIMEOUT)
+            finally:
+                prober.close()
+
+        method, rtt = asyncio.run(run())
+        self.assertEqual(method, f"udp-{self.echo.port}")
+        self.assertIsInstance(rtt, float)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,47 @@
+"""
+Stage percentiles of the self-profiler across the range it has to diagnose
+
+Usage:
+python -m pytest tests
+"""
+
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ping_profiler import Profiler
+
+
+class ProfilerStageTest(unittest.TestCase):
+    def setUp(self):
+        self.profiler = Profiler()
+        self.profiler.enable()
+
+    def test_slow_stages_keep_their_percentiles(self):
+        # Cycles of 0.5 to 4 s, far above the 60 ms that used to be the top bucket
+        for i in range(100):
+            self.profiler.stage("cycle", 0.5 + 0.035 * i)
+        stats = self.profiler.snapshot()["stages"]["cycle"]
+        self.assertEqual(stats["count"], 100)
+        self.assertAlmostEqual(stats["mean_ms"], 2232.5, places=3)
+        self.assertAlmostEqual(stats["max_ms"], 3965.0, places=3)
+        # Buckets are ~2% wide
+        self.assertAlmostEqual(stats["p50_ms"], 2250.0, delta=2250.0 * 0.03)
+        self.assertAlmostEqual(stats["p95_ms"], 3825.0, delta=3825.0 * 0.03)
+        self.assertAlmostEqual(stats["p99_ms"], 3965.0, delta=3965.0 * 0.03)
+        self.assertLess(stats["p50_ms"], stats["p95_ms"])
+
+    def test_fast_and_slow_stages_side_by_side(self):
+        for _ in range(10):
+            self.profiler.stage("dns", 12.0)
+            self.profiler.stage("parse", 0.00005)
+        stages = self.profiler.snapshot()["stages"]
+        self.assertAlmostEqual(stages["dns"]["p99_ms"], 12000.0, delta=12000.0 * 0.03)
+        self.assertAlmostEqual(stages["parse"]["p50_ms"], 0.05, delta=0.05 * 0.03)
+        self.assertAlmostEqual(stages["parse"]["total_ms"], 0.5, places=3)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,50 @@
+"""
+Adaptive scheduling decisions for steady, swinging and dead targets
+
+Usage:
+python -m pytest tests
+"""
+
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ping_schedule import VOLATILE_SAMPLES, AdaptivePolicy
+
+
+class AdaptivePolicyTest(unittest.TestCase):
+    def setUp(self):
+        self.policy = AdaptivePolicy(1.0)
+
+    def feed(self, target, values):
+        reasons = []
+        now = 0.0
+        for value in values:
+            self.policy.due([target], now)
+            self.policy.observe(target, value, now)
+            reasons.append(self.policy.decisions(now)[target]["reason"])
+            now += 1.0
+        return reasons
+
+    def test_steady_target_is_never_volatile(self):
+        # The deviation starts at srtt / 2 (RFC 6298) - that seed isn't volatility
+        reasons = self.feed("steady", [50.0] * 20)
+        self.assertNotIn("volatile", reasons)
+        self.assertEqual(reasons[-1], "stable")
+
+    def test_swinging_target_speeds_up(self):
+        reasons = self.feed("swinging", [20.0, 80.0] * 10)
+        self.assertNotIn("volatile", reasons[:VOLATILE_SAMPLES - 1])
+        self.assertEqual(reasons[-1], "volatile")
+        self.assertEqual(self.policy.decisions(0.0)["swinging"]["interval"], 0.5)
+
+    def test_dead_target_backs_off(self):
+        reasons = self.feed("dead", ["timeout"] * 5)
+        self.assertEqual(reasons[-1], "backoff")
+        self.assertGreater(self.policy.decisions(0.0)["dead"]["interval"], 1.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
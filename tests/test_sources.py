@@ -0,0 +1,93 @@
+"""
+Probes bound to a source address, checked from the listener's side
+
+127.0.0.2 is a second address on the Linux loopback; the tests are skipped
+where it can't be bound (macOS and Windows only have 127.0.0.1).
+
+Usage:
+python -m pytest tests
+"""
+
+import asyncio
+import os
+import socket
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ping_probers import PAYLOAD, MultiProber, TcpProber, UdpProber
+from test_probers import TIMEOUT, UdpEcho, probe
+
+SOURCE = "127.0.0.2"
+
+
+def can_bind(address):
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    try:
+        sock.bind((address, 0))
+    except OSError:
+        return False
+    finally:
+        sock.close()
+    return True
+
+
+@unittest.skipUnless(can_bind(SOURCE), f"{SOURCE} is not a local address here")
+class SourceBindingTest(unittest.TestCase):
+    def setUp(self):
+        self.echo = UdpEcho()
+
+    def tearDown(self):
+        self.echo.close()
+
+    def test_udp_probe_leaves_from_source(self):
+        rtt = probe(UdpProber(self.echo.port, payload=PAYLOAD, source=SOURCE), "127.0.0.1")
+        self.assertIsInstance(rtt, float)
+        self.assertEqual(self.echo.peers, [SOURCE])
+
+    def test_udp_burst_leaves_from_source(self):
+        prober = UdpProber(self.echo.port, payload=PAYLOAD, source=SOURCE)
+
+        async def run():
+            prober.open()
+            try:
+                return await prober.burst("127.0.0.1", 3, 0.01, TIMEOUT)
+            finally:
+                prober.close()
+
+        rtts, _ = asyncio.run(run())
+        self.assertTrue(all(isinstance(rtt, float) for rtt in rtts))
+        self.assertEqual(self.echo.peers, [SOURCE] * 3)
+
+    def test_tcp_probe_leaves_from_source(self):
+        listener = socket.create_server(("127.0.0.1", 0))
+        listener.settimeout(TIMEOUT)
+        try:
+            rtt = probe(TcpProber(listener.getsockname()[1], source=SOURCE), "127.0.0.1")
+            _, peer = listener.accept()
+        finally:
+            listener.close()
+        self.assertIsInstance(rtt, float)
+        self.assertEqual(peer[0], SOURCE)
+
+    def test_sourced_spec_routes_to_bound_backend(self):
+        # The same server probed from both addresses - each probe keeps its own source
+        target = f"udp://127.0.0.1:{self.echo.port}"
+        prober = MultiProber()
+
+        async def run():
+            prober.open()
+            try:
+                return [await prober.probe(spec, TIMEOUT) for spec in (target, f"{target}@{SOURCE}")]
+            finally:
+                prober.close()
+
+        rtts = asyncio.run(run())
+        self.assertTrue(all(isinstance(rtt, float) for rtt in rtts))
+        self.assertEqual(self.echo.peers, ["127.0.0.1", SOURCE])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,71 @@
+"""
+History writer behaviour when samples repeat, pile up or can't be stored at all
+
+Usage:
+python -m pytest tests
+"""
+
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ping_storage import PingStorage, StorageWriter
+
+BASE = 1800000000.0  # On a whole hour
+
+
+class StorageWriterTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "history.db")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_duplicate_samples_are_counted_once(self):
+        writer = StorageWriter(self.path, flush_interval=0.05).start()
+        for rtt in (10.0, 20.0, 30.0):
+            writer.record_sample("a", BASE + 1, 10.0)
+            writer.record_sample("a", BASE + 2, rtt)  # Same timestamp again - the first one stays
+        writer.stop(5)
+        self.assertEqual((writer.written, writer.duplicates), (2, 4))
+        storage = PingStorage(self.path)
+        try:
+            self.assertEqual(storage.samples("a", BASE, BASE + 60), [(BASE + 1, 10.0), (BASE + 2, 10.0)])
+            self.assertEqual(storage.rollup("a", "1m", BASE, BASE + 60), [(BASE, 2, 0, 10.0, 10.0, 10.0)])
+            self.assertEqual(storage.summary("a", BASE, BASE + 7200), (2, 0, 10.0, 10.0, 10.0))
+        finally:
+            storage.close()
+
+    def test_full_queue_drops_new_samples(self):
+        writer = StorageWriter(self.path, max_queued=3)  # Not started - nothing drains the queue
+        with contextlib.redirect_stdout(io.StringIO()) as out:
+            for i in range(5):
+                writer.record_sample("a", BASE + i, 10.0)
+        self.assertEqual(writer.queue.qsize(), 3)
+        self.assertEqual(writer.dropped, 2)
+        self.assertEqual(out.getvalue().count("Error"), 1)
+
+    def test_unopenable_database_drops_samples(self):
+        path = os.path.join(self.tmp.name, "missing", "history.db")
+        with contextlib.redirect_stdout(io.StringIO()) as out:
+            writer = StorageWriter(path, max_queued=10)
+            writer.record_sample("a", BASE, 10.0)
+            writer.start()
+            writer.thread.join(5)
+            for i in range(100):
+                writer.record_sample("a", BASE + i, 10.0)
+            writer.stop(5)
+        self.assertTrue(writer.failed)
+        self.assertEqual(writer.queue.qsize(), 0)
+        self.assertEqual(writer.dropped, 101)
+        self.assertEqual(out.getvalue().count("Error"), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()